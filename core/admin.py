@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import IdempotencyKey
+
+# Register your models here.
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'status_code', 'created_at', 'expires_at')
+    search_fields = ('key',)
+    list_select_related = ('user',)
@@ -5,5 +5,10 @@ class SalesApiConfig(AppConfig):
     name = 'core'
 
     def ready(self):
+        from . import checks  # noqa: F401
+        from .roles import connect_roles_signals
         from .signals import setup_roles
-        setup_roles()
\ No newline at end of file
+        from .versioning import connect_version_signals
+        setup_roles()
+        connect_roles_signals()
+        connect_version_signals()
\ No newline at end of file
@@ -0,0 +1,109 @@
+from asgiref.sync import sync_to_async
+from django.db.models import prefetch_related_objects
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import AsyncJWTAuthentication
+from .pagination import KeysetPagination
+from .permissions import CachedDjangoModelPermissions, DenyIfNoRole
+from .roles import aget_user_roles
+
+
+class AsyncReadOnlyView(View):
+    """
+    Read-only list/retrieve endpoint served with the async ORM, for running the
+    read-heavy endpoints under ASGI. DRF views are sync only, so this is a plain
+    Django async view that reuses the API pieces: JWT authentication, the role
+    checks of core.permissions, the filtersets, keyset pagination and the same
+    serializers (the output matches the DRF endpoint in cursor mode).
+
+    GET <prefix>/ lists, GET <prefix>/<pk>/ retrieves. The list is read with
+    aiterator(), which can't prefetch, so `prefetch` lookups run on the page after.
+    ?ordering= is honoured when `filter_backends` has an OrderingFilter (the
+    paginator reads it, whitelisted by `ordering_fields`), as in the DRF viewsets.
+    """
+    queryset = None
+    serializer_class = None
+    filterset_class = None
+    filter_backends = ()
+    ordering_fields = None
+    prefetch = ()
+    ordering = ('id',)
+    authentication_class = AsyncJWTAuthentication
+    permission_classes = (CachedDjangoModelPermissions, DenyIfNoRole)
+    pagination_class = KeysetPagination
+    renderer = JSONRenderer()
+
+    async def get(self, request, pk=None):
+        try:
+            await self.initial(request)
+            if pk is not None:
+                data = await self.retrieve(request, pk)
+            else:
+                data = await self.list(request)
+        except Http404:
+            return self.handle_exception(exceptions.NotFound())
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+        return self.render(data)
+
+    async def initial(self, request):
+        authenticator = self.authentication_class()
+        user_auth = await authenticator.aauthenticate(request)
+        if user_auth is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = user_auth
+        # the serializers read the roles synchronously (get_user_roles), so load them here
+        await aget_user_roles(request)
+
+        for permission in (permission_class() for permission_class in self.permission_classes):
+            if not await permission.ahas_permission(request, self):
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, request, queryset):
+        if self.filterset_class is None:
+            return queryset
+        filterset = self.filterset_class(request.GET, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise exceptions.ValidationError(filterset.errors)
+        return filterset.qs
+
+    def get_serializer(self, instance, request, **kwargs):
+        return self.serializer_class(instance, context={'request': request, 'view': self}, **kwargs)
+
+    async def retrieve(self, request, pk):
+        try:
+            instance = await self.get_queryset().aget(pk=pk)
+        except (self.queryset.model.DoesNotExist, ValueError):
+            raise Http404
+        await sync_to_async(prefetch_related_objects)([instance], *self.prefetch)
+        return self.get_serializer(instance, request).data
+
+    async def list(self, request):
+        # filters may validate choices against the database
+        queryset = await sync_to_async(self.filter_queryset)(request, self.get_queryset())
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(queryset, Request(request), view=self)
+        await sync_to_async(prefetch_related_objects)(rows, *self.prefetch)
+        response = paginator.get_paginated_response(self.get_serializer(rows, request, many=True).data)
+        self.headers = {name: response[name] for name in ('X-Total-Count-Estimated',) if response.has_header(name)}
+        return response.data
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        response = HttpResponse(self.renderer.render(data), content_type='application/json', status=status_code)
+        for name, value in {**getattr(self, 'headers', {}), **(headers or {})}.items():
+            response[name] = value
+        return response
+
+    def handle_exception(self, exc):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            headers['WWW-Authenticate'] = self.authentication_class().authenticate_header(None)
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return self.render(data, exc.status_code, headers)
@@ -0,0 +1,122 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.response import Response
+
+from .roles import get_user_roles
+from .versioning import get_versions
+
+# headers set by the paginators that must survive a cache hit
+CACHED_HEADERS = ('X-Total-Count-Estimated',)
+
+
+class VersionedViewMixin:
+    """
+    Base for viewset mixins whose responses are identified by the request and the
+    version stamps (core.versioning) of the tables the response is built from.
+    """
+    cache_dependencies = ()
+
+    def get_cache_dependencies(self):
+        return self.cache_dependencies or (self.get_queryset().model,)
+
+    def get_response_fingerprint(self, request, versions):
+        # url (path, filters, ordering, page), role (Viewers get a different
+        # representation), negotiated format and table versions
+        role = 'viewer' if get_user_roles(request).is_viewer else 'full'
+        params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+        raw = repr((request.get_host(), request.path, params, role, versions,
+                    getattr(request, 'accepted_media_type', None)))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+
+class ConditionalGetMixin(VersionedViewMixin):
+    """
+    ETag / Last-Modified for list/retrieve. Both derive from the table version
+    stamps only, so a matching If-None-Match (or a not newer If-Modified-Since) is
+    answered with 304 before the queryset or the serializer run.
+
+    Last-Modified has a resolution of one second, so it is only sent (and
+    If-Modified-Since only honoured) once the second of the newest stamp is over:
+    a later write in that same second would otherwise keep the same date.
+
+    Off without a shared cache (SHARED_CACHE): each process would have its own stamps.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        if not settings.SHARED_CACHE or self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+
+        versions = get_versions(*self.get_cache_dependencies())
+        etag = f'"{self.get_response_fingerprint(request, versions)}"'
+        last_modified = max(versions) // 1_000_000
+        settled = last_modified < int(time.time())
+
+        if_none_match = request.headers.get('If-None-Match')
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if if_none_match is not None:
+            not_modified = etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+        else:
+            not_modified = settled and if_modified_since is not None and last_modified <= if_modified_since
+
+        response = HttpResponseNotModified() if not_modified else handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if settled:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class CachedResponseMixin(VersionedViewMixin):
+    """
+    Cache list/retrieve responses of a viewset.
+
+    The key covers the url (path, filters, ordering, page) and the role of the user
+    (Viewers get a different representation), plus the version stamps of
+    `cache_dependencies`: any write to one of those tables makes the old entries
+    unreachable, so there is nothing to delete on writes. Off without a shared
+    cache (SHARED_CACHE), where a write would only invalidate its own process.
+    """
+    cached_actions = ('list', 'retrieve')
+
+    def get_response_cache_key(self, request):
+        fingerprint = self.get_response_fingerprint(request, get_versions(*self.get_cache_dependencies()))
+        return f"response:{self.basename}:{self.action}:{fingerprint}"
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if not (settings.SHARED_CACHE and settings.RESPONSE_CACHE_TIMEOUT) or self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            response = Response(data, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+            cache.set(key, (response.data, headers), settings.RESPONSE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
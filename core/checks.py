@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if settings.SHARED_CACHE:
+        return []
+    return [Warning(
+        'CACHE_URL is not set: every process has its own in-memory cache.',
+        hint='The response cache, ETag/Last-Modified, cached counts and roles and async bulk '
+             'ingestion are turned off. Set CACHE_URL to a Redis URL shared by all processes.',
+        id='core.W001',
+    )]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class PostgresOnlyRunSQL(migrations.RunSQL):
+    """
+    RunSQL for PostgreSQL-specific DDL (GIN/trigram indexes, ...). It is a no-op on
+    other databases, so the same migrations still run on SQLite (tests).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
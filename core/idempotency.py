@@ -0,0 +1,102 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    HEADER, OpenApiTypes.STR, location=OpenApiParameter.HEADER,
+    description='Repeats with the same key get the stored response instead of running again',
+)
+
+
+def _dumps(value):
+    return json.dumps(value, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+
+
+def request_hash(request):
+    raw = _dumps([request.method, request.path, request.data])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class _Discard(Exception):
+    # rolls back the key of a response that must not be replayed
+    def __init__(self, response):
+        self.response = response
+
+
+def idempotent(view):
+    """
+    Viewset method decorator for `Idempotency-Key` requests.
+
+    The first request with a key inserts the key row and runs the view in the
+    same transaction, storing the response (as json) before committing. A
+    concurrent duplicate blocks on the unique (user, key) index until then and
+    gets the stored response, so the view never runs twice. 5xx responses and
+    exceptions (validation errors included) roll the key back, so the request
+    can be retried. Keys live IDEMPOTENCY_KEY_TTL_HOURS; reusing one for a
+    different request returns 422.
+    """
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(self, request, *args, **kwargs)
+        if not key or len(key) > 255:
+            return Response({'error': f'{HEADER} must be 1 to 255 characters'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user if request.user.is_authenticated else None
+        fingerprint = request_hash(request)
+        now = timezone.now()
+        expires_at = now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        try:
+            with transaction.atomic():
+                record, created = IdempotencyKey.objects.select_for_update().get_or_create(
+                    user=user, key=key, defaults={'request_hash': fingerprint, 'expires_at': expires_at})
+                if not created and record.expires_at > now and record.status_code is not None:
+                    if record.request_hash != fingerprint:
+                        return Response({'error': f'{HEADER} was already used for a different request'},
+                                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                    return Response(record.response, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+                response = view(self, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    raise _Discard(response)
+                record.request_hash = fingerprint
+                record.expires_at = expires_at
+                record.status_code = response.status_code
+                record.response = json.loads(_dumps(response.data))
+                record.save(update_fields=['request_hash', 'expires_at', 'status_code', 'response'])
+                return response
+        except _Discard as discarded:
+            return discarded.response
+
+    return wrapper
+
+
+def purge_expired_keys(batch_size=None, now=None):
+    """
+    Delete expired keys, `batch_size` rows per DELETE. Returns how many were deleted.
+    """
+    batch_size = batch_size or settings.IDEMPOTENCY_PURGE_BATCH_SIZE
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).order_by('id')
+                   .values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
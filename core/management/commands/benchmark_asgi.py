@@ -0,0 +1,113 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# (label, server command, path): the DRF endpoint on sync gunicorn workers
+# against the async endpoint (core.async_views) on uvicorn, same worker count.
+# Both servers run with the response cache off (SERVER_ENV) and the requests send
+# no conditional headers, so every request of both sides reads the database.
+TARGETS = (
+    ('gunicorn sync', ['gunicorn', 'sales_api.wsgi:application', '--workers', '{workers}', '--bind', '127.0.0.1:{port}'],
+     '/api/{resource}/?pagination=cursor'),
+    ('uvicorn async', ['uvicorn', 'sales_api.asgi:application', '--workers', '{workers}', '--port', '{port}',
+                       '--no-access-log'],
+     '/api/async/{resource}/'),
+)
+SERVER_ENV = {'RESPONSE_CACHE_TIMEOUT': '0'}
+
+
+class Command(BaseCommand):
+    help = ('Requests/sec and latency of one uncached list page (first cursor page, same rows and JSON) served '
+            'by the DRF viewset on sync gunicorn workers vs by the async view (/api/async/) on uvicorn, with the '
+            'same worker count. The response cache is disabled on both servers and no conditional headers are '
+            'sent, so both sides query the database on every request.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='User the requests authenticate as')
+        parser.add_argument('--resource', default='products', choices=['products', 'labels', 'customers', 'orders'])
+        parser.add_argument('--workers', type=int, default=4, help='Server worker processes')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 32, 128], help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stderr.write(self.style.WARNING('The servers share the database with this process; '
+                                                 'SQLite serializes them, use PostgreSQL for real numbers.'))
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} not found")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        for label, command, path in TARGETS:
+            command = [sys.executable, '-m'] + [arg.format(**options) for arg in command]
+            server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                      env={**os.environ, **SERVER_ENV})
+            try:
+                self.wait_for_port(options['port'], server)
+                request = (f"GET {path.format(**options)} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+                           f"Authorization: Bearer {token}\r\nConnection: close\r\n\r\n").encode()
+                # two requests: the second one would be a response cache hit if the cache were on
+                for _ in range(2):
+                    head = asyncio.run(self.fetch(options['port'], request)).split(b'\r\n\r\n', 1)[0]
+                if not head.startswith(b'HTTP/1.1 200') or b'\r\nX-Cache: HIT' in head:
+                    raise CommandError(f'{label}: expected an uncached 200, got {head.decode(errors="replace")}')
+                for clients in options['concurrency']:
+                    latencies, errors = asyncio.run(self.run(options['port'], request, clients, options['duration']))
+                    latencies.sort()
+                    p50, p95 = (latencies[int(len(latencies) * q)] * 1000 if latencies else 0 for q in (0.5, 0.95))
+                    self.stdout.write(f'{label:>13}  clients {clients:>3}: {len(latencies) / options["duration"]:8.1f} '
+                                      f'req/s  p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  ({errors} errors)')
+            finally:
+                server.terminate()
+                server.wait()
+
+    def wait_for_port(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'{server.args[2]} exited with {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'{server.args[2]} did not start listening on port {port}')
+
+    async def fetch(self, port, request):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def run(self, port, request, clients, duration):
+        latencies = []
+        errors = 0
+        deadline = time.monotonic() + duration
+
+        async def client():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    response = await self.fetch(port, request)
+                except OSError:
+                    errors += 1
+                    continue
+                if response.startswith(b'HTTP/1.1 200'):
+                    latencies.append(time.monotonic() - started)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return latencies, errors
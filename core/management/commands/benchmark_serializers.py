@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from customers.models import Customer
+from orders.models import Order, OrderItem
+from orders.serializers import OrderSerializer
+from products.models import Label, Product
+from products.serializers import ProductSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare the DRF and the fast-path read serialization of orders and products (FAST_READ_SERIALIZERS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Page sizes to serialize')
+        parser.add_argument('--repeat', type=int, default=20, help='Serializations per page size and mode')
+        parser.add_argument('--items', type=int, default=3, help='Items per order')
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        # the sample rows are created inside a transaction that is always rolled back
+        try:
+            with transaction.atomic():
+                self.seed(max(sizes), options['items'])
+                self.run('orders', OrderSerializer,
+                         Order.objects.select_related('customer').prefetch_related('items__product').order_by('id'),
+                         sizes, options['repeat'])
+                self.run('products', ProductSerializer,
+                         Product.objects.prefetch_related('labels').filter(sku__startswith='BENCH-').order_by('id'),
+                         sizes, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count, items_per_order):
+        labels = Label.objects.bulk_create([Label(name=f'bench-{i}') for i in range(5)])
+        products = Product.objects.bulk_create([
+            Product(name=f'Bench product {i}', sku=f'BENCH-{i}', price=f'{i % 97 + 1}.50', stock=100)
+            for i in range(count)
+        ])
+        through = Product.labels.through
+        through.objects.bulk_create([through(product_id=p.id, label_id=labels[i % 5].id) for i, p in enumerate(products)])
+
+        customer = Customer.objects.create(full_name='Bench customer', email='bench@example.com')
+        orders = Order.objects.bulk_create([Order(customer=customer) for _ in range(count)])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=products[(i + j) % count], quantity=j + 1, unit_price=products[(i + j) % count].price)
+            for i, order in enumerate(orders) for j in range(items_per_order)
+        ])
+        Order.objects.filter(id__in=[o.id for o in orders]).refresh_totals()
+
+    def run(self, name, serializer_class, queryset, sizes, repeat):
+        renderer = JSONRenderer()
+        self.stdout.write(f'{name}:')
+        for size in sizes:
+            page = list(queryset[:size])
+            timings, outputs = {}, {}
+            for fast in (False, True):
+                with override_settings(FAST_READ_SERIALIZERS=fast):
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        data = serializer_class(page, many=True).data
+                    timings[fast] = (time.perf_counter() - start) / repeat
+                    outputs[fast] = renderer.render(data)
+
+            if outputs[False] != outputs[True]:
+                self.stderr.write(self.style.ERROR(f'  page size {size}: outputs differ'))
+                continue
+            self.stdout.write(
+                f'  page size {size:>5}: drf {timings[False] * 1000:8.2f} ms  '
+                f'fast {timings[True] * 1000:8.2f} ms  x{timings[False] / timings[True]:.1f}  (identical output)'
+            )
@@ -88,4 +88,5 @@ class Command(BaseCommand):
                                          product=product, 
                                          quantity=quantity,
                                          unit_price=product.price)
+            order.refresh_totals()
         self.stdout.write(f'Created {count} orders.')
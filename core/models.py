@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response stored for an `Idempotency-Key` sent by a user, replayed for repeats
+    of the request until `expires_at`. See core.idempotency.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True,
+                             related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # sha256 of method, path and body: a key can't be reused for another request
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key} ({self.status_code})"
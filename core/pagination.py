@@ -0,0 +1,378 @@
+import hashlib
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import DecimalField, FloatField, IntegerField, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .versioning import VERSIONED_APPS, get_versions
+
+
+def _planner_estimate(queryset):
+    # row estimate of the query plan, without running the query (PostgreSQL only)
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _queryset_models(queryset, sql):
+    # every model whose table the SQL reads: joins, subqueries and m2m through tables
+    quote_name = connections[queryset.db].ops.quote_name
+    return [model for model in apps.get_models(include_auto_created=True)
+            if quote_name(model._meta.db_table) in sql]
+
+
+def estimate_count(queryset, threshold=None):
+    """
+    Returns (count, is_estimate).
+
+    Counts up to `threshold` rows exactly with a bounded COUNT over LIMIT threshold + 1.
+    Above it the count comes from a cache keyed by the SQL of the query and the
+    version stamps of every table it reads, joined or in a subquery (so any write
+    invalidates it); on a miss PostgreSQL answers with the planner's row estimate
+    and other databases with an exact COUNT(*), which is then cached. Queries that
+    read a table without a version stamp are never cached, and nothing is cached
+    without a shared cache (SHARED_CACHE).
+    """
+    threshold = settings.PAGINATION_EXACT_COUNT_THRESHOLD if threshold is None else threshold
+    queryset = queryset.order_by()
+    bounded = queryset[:threshold + 1].count()
+    if bounded <= threshold:
+        return bounded, False
+
+    sql, params = queryset.query.sql_with_params()
+    models = _queryset_models(queryset, sql)
+    key = None
+    if settings.SHARED_CACHE and all(model._meta.app_label in VERSIONED_APPS for model in models):
+        versions = get_versions(*models)
+        digest = hashlib.md5(repr((queryset.db, sql, params, versions)).encode()).hexdigest()
+        key = f"count-estimate:{queryset.model._meta.label_lower}:{digest}"
+
+    count = cache.get(key) if key else None
+    if count is None:
+        if connections[queryset.db].vendor == 'postgresql':
+            count = max(_planner_estimate(queryset), bounded)
+        else:
+            count = queryset.count()
+        if key:
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count, True
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """
+    Django paginator whose count comes from `estimate_count`. When the count is an
+    estimate, pages past the estimated end are still served (possibly empty)
+    instead of raising 404.
+    """
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        count, self.is_estimate = estimate_count(self.object_list)
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # already validated as an integer by the parent
+            if self.is_estimate and float(number) > 1:
+                return int(float(number))
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.is_estimate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page number pagination whose `count` is exact for small result sets and a cheap
+    (cached or planner) estimate above PAGINATION_EXACT_COUNT_THRESHOLD. Estimated
+    counts are flagged with the X-Total-Count-Estimated header.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.page.paginator.is_estimate:
+            response['X-Total-Count-Estimated'] = 'true'
+        return response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination: the cursor holds the ordering values of the last row
+    served and the next page is fetched with WHERE (a, id) < (x, y) instead of an
+    OFFSET, so deep pages cost the same as the first one and no COUNT(*) is run.
+
+    The ordering comes from the view's OrderingFilter (or `view.ordering`) and the
+    primary key is appended as a tiebreaker so the order is always total.
+    The total count is only computed when requested: ?count=true for an exact
+    count, ?count=estimate for `estimate_count`.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self._page_queryset(queryset, request, view)
+        self.count = self.get_count(queryset) if self.wants_count(request) else None
+        return self._page_rows(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset for async views: the page is read with aiterator().
+        """
+        page = self._page_queryset(queryset, request, view)
+        self.count = await sync_to_async(self.get_count)(queryset) if self.wants_count(request) else None
+        return self._page_rows([row async for row in page.aiterator()])
+
+    def _page_queryset(self, queryset, request, view):
+        # the page (plus one row, to know if there is more) after the cursor position
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = [self._get_field(queryset, name.lstrip('-')) for name in self.ordering]
+        # model fields by attname, annotations by their name
+        self.columns = [name.lstrip('-') if name.lstrip('-') in queryset.query.annotations else field.attname
+                        for name, field in zip(self.ordering, self.fields)]
+        self.count_is_estimate = False
+
+        position, self.reverse = self.decode_cursor(request)
+        ordering = [self._invert(name) for name in self.ordering] if self.reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, position))
+        self.position = position
+        return queryset[:self.page_size + 1]
+
+    def _page_rows(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = position is not None if not reverse else has_more
+        self.next_position = self._position(rows[-1]) if rows and has_next else None
+        self.previous_position = self._position(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        pk_name = queryset.model._meta.pk.name
+        ordering = [name.replace('pk', pk_name) if name.lstrip('-') == 'pk' else name for name in ordering]
+        if not any(name.lstrip('-') == pk_name for name in ordering):
+            # primary key tiebreaker in the same direction as the main ordering
+            ordering.append(f"-{pk_name}" if ordering[0].startswith('-') else pk_name)
+        return tuple(ordering)
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'exact', 'estimate')
+
+    def get_count(self, queryset):
+        if self.request.query_params.get(self.count_query_param, '').lower() == 'estimate':
+            count, self.count_is_estimate = estimate_count(queryset)
+            return count
+        return queryset.count()
+
+    def get_paginated_response(self, data):
+        body = {}
+        if self.count is not None:
+            body['count'] = self.count
+        body.update({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+        response = Response(body)
+        if self.count_is_estimate:
+            response['X-Total-Count-Estimated'] = 'true'
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123,
+                          'description': f'Only present with ?{self.count_query_param}=true|estimate.'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Include the total count of results: 'true' (exact) or 'estimate'.",
+                'schema': {'type': 'string', 'enum': ['true', 'estimate']},
+            },
+        ]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   self.encode_cursor(self.previous_position, reverse=True))
+
+    def encode_cursor(self, position, reverse=False):
+        payload = {'o': list(self.ordering), 'v': [self._serialize(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        return b64encode(json.dumps(payload, separators=(',', ':')).encode(), altchars=b'-_').decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded + '=' * (-len(encoded) % 4), altchars=b'-_'))
+            if payload['o'] != list(self.ordering) or len(payload['v']) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, payload['v'])]
+        except (BinasciiError, DjangoValidationError, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    def _position(self, instance):
+        return [getattr(instance, column) for column in self.columns]
+
+    @staticmethod
+    def _serialize(value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _invert(name):
+        return name[1:] if name.startswith('-') else f"-{name}"
+
+    def _get_field(self, queryset, name):
+        # a concrete model field, or a numeric annotation (e.g. a search rank)
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            field = annotation.output_field
+            if not isinstance(field, (IntegerField, FloatField, DecimalField)):
+                raise NotFound(f"Cannot paginate by cursor on '{name}'.")
+            return field
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete or field.many_to_many:
+            raise NotFound(f"Cannot paginate by cursor on '{name}'.")
+        return field
+
+    def _seek_filter(self, ordering, position):
+        # (a > x) OR (a = x AND b > y) OR ... respecting the direction of every column
+        seek = Q()
+        for index, name in enumerate(ordering):
+            clause = Q(**dict(zip(self.columns[:index], position[:index])))
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            clause &= Q(**{f"{self.columns[index]}__{lookup}": position[index]})
+            seek |= clause
+        return seek
+
+
+class SelectablePagination(BasePagination):
+    """
+    Page number pagination by default, keyset pagination when the request asks
+    for it (?pagination=cursor or a ?cursor=...) or when the view sets
+    `pagination_mode = 'cursor'`.
+    """
+    page_number_class = EstimatedCountPagination
+    keyset_class = KeysetPagination
+    mode_query_param = 'pagination'
+
+    def get_mode(self, request, view):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in ('page', 'cursor'):
+            return mode
+        if request.query_params.get(self.keyset_class.cursor_query_param):
+            return 'cursor'
+        return getattr(view, 'pagination_mode', 'page')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        delegate_class = self.keyset_class if self.get_mode(request, view) == 'cursor' else self.page_number_class
+        self.delegate = delegate_class()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(getattr(self, 'delegate', None), 'display_page_controls', False)
+
+    def to_html(self):
+        return self.delegate.to_html()
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number_class().get_schema_operation_parameters(view),
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Pagination style: 'page' (default) or 'cursor'.",
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+            *self.keyset_class().get_schema_operation_parameters(view),
+        ]
@@ -1,4 +1,6 @@
-from rest_framework.permissions import BasePermission
+from rest_framework.permissions import BasePermission, DjangoModelPermissions
+
+from .roles import aget_user_roles, auser_has_perms, get_user_roles, user_has_perms
 
 class DenyIfNoRole(BasePermission):
     """
@@ -14,7 +16,47 @@ class DenyIfNoRole(BasePermission):
             return False
         if user.is_superuser:
             return True
-        has_group = user.groups.exists()
-        has_user_perms = user.user_permissions.exists()
 
-        return has_group or has_user_perms
+        return get_user_roles(request).has_role
+
+    async def ahas_permission(self, request, view):
+        # same check for core.async_views
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        if user.is_superuser:
+            return True
+
+        return (await aget_user_roles(request)).has_role
+
+
+class CachedDjangoModelPermissions(DjangoModelPermissions):
+    """
+    DjangoModelPermissions que consulta los permisos ya resueltos para el request
+    (core.roles) en lugar de user.has_perms().
+    """
+
+    def has_permission(self, request, view):
+        if not request.user or (
+           not request.user.is_authenticated and self.authenticated_users_only):
+            return False
+
+        # Workaround to ensure DjangoModelPermissions are not applied
+        # to the root view when using DefaultRouter.
+        if getattr(view, '_ignore_model_permissions', False):
+            return True
+
+        queryset = self._queryset(view)
+        perms = self.get_required_permissions(request.method, queryset.model)
+
+        return user_has_perms(request, perms)
+
+    async def ahas_permission(self, request, view):
+        # same check for core.async_views
+        if not request.user or (
+           not request.user.is_authenticated and self.authenticated_users_only):
+            return False
+
+        perms = self.get_required_permissions(request.method, view.queryset.model)
+
+        return await auser_has_perms(request, perms)
@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+GENERATION_KEY = 'user-roles:generation'
+
+
+@dataclass(frozen=True)
+class UserRoles:
+    """
+    Everything the API needs to authorize a user: group names and the full set of
+    "app_label.codename" permissions (own + inherited from groups).
+    """
+    groups: frozenset = frozenset()
+    permissions: frozenset = frozenset()
+    has_user_permissions: bool = False
+
+    @property
+    def has_role(self):
+        return bool(self.groups) or self.has_user_permissions
+
+    @property
+    def is_viewer(self):
+        return 'Viewer' in self.groups
+
+
+NO_ROLES = UserRoles()
+
+
+def load_user_roles(user):
+    user_perms = user.user_permissions.order_by().values_list('content_type__app_label', 'codename')
+    group_perms = Group.permissions.through.objects.filter(group__user=user).values_list(
+        'permission__content_type__app_label', 'permission__codename')
+    user_perms = {f"{app_label}.{codename}" for app_label, codename in user_perms}
+    return UserRoles(
+        groups=frozenset(user.groups.values_list('name', flat=True)),
+        permissions=frozenset(user_perms | {f"{app_label}.{codename}" for app_label, codename in group_perms}),
+        has_user_permissions=bool(user_perms),
+    )
+
+
+async def aload_user_roles(user):
+    """
+    load_user_roles with the async ORM.
+    """
+    user_perms = {f"{app_label}.{codename}" async for app_label, codename in
+                  user.user_permissions.order_by().values_list('content_type__app_label', 'codename')}
+    group_perms = {f"{app_label}.{codename}" async for app_label, codename in
+                   Group.permissions.through.objects.filter(group__user=user).values_list(
+                       'permission__content_type__app_label', 'permission__codename')}
+    return UserRoles(
+        groups=frozenset([name async for name in user.groups.values_list('name', flat=True)]),
+        permissions=frozenset(user_perms | group_perms),
+        has_user_permissions=bool(user_perms),
+    )
+
+
+def _cache_key(user_id):
+    generation = cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+    return f"user-roles:{generation}:{user_id}"
+
+
+async def _acache_key(user_id):
+    generation = await cache.aget_or_set(GENERATION_KEY, 0, timeout=None)
+    return f"user-roles:{generation}:{user_id}"
+
+
+def get_user_roles(request):
+    """
+    Roles of the request's user, resolved once per request and shared between the
+    permission classes and the serializers. With ROLES_CACHE_TIMEOUT > 0 they are
+    also kept in the shared cache for that many seconds (only if SHARED_CACHE).
+    """
+    request = getattr(request, '_request', request)
+    roles = getattr(request, '_user_roles', None)
+    if roles is not None:
+        return roles
+
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated):
+        roles = NO_ROLES
+    elif settings.SHARED_CACHE and settings.ROLES_CACHE_TIMEOUT:
+        key = _cache_key(user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = load_user_roles(user)
+            cache.set(key, roles, settings.ROLES_CACHE_TIMEOUT)
+    else:
+        roles = load_user_roles(user)
+
+    request._user_roles = roles
+    return roles
+
+
+async def aget_user_roles(request):
+    """
+    get_user_roles for async views, sharing the per-request and the shared cache.
+    """
+    request = getattr(request, '_request', request)
+    roles = getattr(request, '_user_roles', None)
+    if roles is not None:
+        return roles
+
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated):
+        roles = NO_ROLES
+    elif settings.SHARED_CACHE and settings.ROLES_CACHE_TIMEOUT:
+        key = await _acache_key(user.pk)
+        roles = await cache.aget(key)
+        if roles is None:
+            roles = await aload_user_roles(user)
+            await cache.aset(key, roles, settings.ROLES_CACHE_TIMEOUT)
+    else:
+        roles = await aload_user_roles(user)
+
+    request._user_roles = roles
+    return roles
+
+
+async def auser_has_perms(request, perms):
+    user = request.user
+    if not user.is_active:
+        return False
+    return user.is_superuser or set(perms) <= (await aget_user_roles(request)).permissions
+
+
+def user_has_perms(request, perms):
+    user = request.user
+    if not user.is_active:
+        return False
+    return user.is_superuser or set(perms) <= get_user_roles(request).permissions
+
+
+def invalidate_roles(**kwargs):
+    # group/permission assignments change rarely: drop every cached role set at once
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+def _on_user_saved(sender, created, **kwargs):
+    # a new user may reuse the id of a deleted one
+    if created:
+        invalidate_roles()
+
+
+def connect_roles_signals():
+    m2m_changed.connect(invalidate_roles, sender=User.groups.through, dispatch_uid='core.roles.groups')
+    m2m_changed.connect(invalidate_roles, sender=User.user_permissions.through,
+                        dispatch_uid='core.roles.user_permissions')
+    m2m_changed.connect(invalidate_roles, sender=Group.permissions.through, dispatch_uid='core.roles.group_permissions')
+    post_save.connect(_on_user_saved, sender=User, dispatch_uid='core.roles.user_created')
+    post_save.connect(invalidate_roles, sender=Group, dispatch_uid='core.roles.group_saved')
+    post_delete.connect(invalidate_roles, sender=Group, dispatch_uid='core.roles.group_deleted')
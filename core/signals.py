@@ -3,7 +3,8 @@ from django.db.models.signals import post_migrate
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.dispatch import receiver
-from django_celery_beat.models import PeriodicTask, CrontabSchedule
+from django.conf import settings
+from django_celery_beat.models import CrontabSchedule, IntervalSchedule, PeriodicTask
 import json
 
 def create_roles(sender, **kwargs):
@@ -64,3 +65,80 @@ def setup_export_csv_task(sender, **kwargs):
         task="orders.tasks.export_daily_orders_to_csv",
         defaults={'args': json.dumps([])}
     )
+
+@receiver(post_migrate)
+def setup_expire_stock_holds_task(sender, **kwargs):
+    if sender.name != 'orders':
+        return
+
+    schedule, _ = CrontabSchedule.objects.get_or_create(
+        minute='*',
+        hour='*',
+        day_of_week='*',
+        day_of_month='*',
+        month_of_year='*'
+    )
+
+    PeriodicTask.objects.get_or_create(
+        crontab=schedule,
+        name='Expire stock holds every minute',
+        task="orders.tasks.expire_stock_holds",
+        defaults={'args': json.dumps([])}
+    )
+
+@receiver(post_migrate)
+def setup_sales_rollup_task(sender, **kwargs):
+    if sender.name != 'reports':
+        return
+
+    schedule, _ = CrontabSchedule.objects.get_or_create(
+        minute='*/15',
+        hour='*',
+        day_of_week='*',
+        day_of_month='*',
+        month_of_year='*'
+    )
+
+    PeriodicTask.objects.get_or_create(
+        crontab=schedule,
+        name='Refresh daily sales rollup every 15 min',
+        task="reports.tasks.refresh_daily_sales_rollup",
+        defaults={'args': json.dumps([])}
+    )
+
+@receiver(post_migrate)
+def setup_purge_idempotency_keys_task(sender, **kwargs):
+    if sender.name != 'core':
+        return
+
+    schedule, _ = CrontabSchedule.objects.get_or_create(
+        minute='30',
+        hour='*',
+        day_of_week='*',
+        day_of_month='*',
+        month_of_year='*'
+    )
+
+    PeriodicTask.objects.get_or_create(
+        crontab=schedule,
+        name='Purge expired idempotency keys every hour',
+        task="core.tasks.purge_idempotency_keys",
+        defaults={'args': json.dumps([])}
+    )
+
+@receiver(post_migrate)
+def setup_drain_outbox_task(sender, **kwargs):
+    if sender.name != 'events':
+        return
+
+    # a few seconds between drains, finer than a crontab can express
+    schedule, _ = IntervalSchedule.objects.get_or_create(
+        every=settings.EVENTS_DRAIN_INTERVAL_SECONDS,
+        period=IntervalSchedule.SECONDS,
+    )
+
+    PeriodicTask.objects.get_or_create(
+        name='Publish order events from the outbox',
+        task="events.tasks.drain_outbox",
+        defaults={'interval': schedule, 'args': json.dumps([])}
+    )
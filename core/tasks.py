@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from .idempotency import purge_expired_keys
+
+
+@shared_task
+def purge_idempotency_keys():
+    """
+    Delete the Idempotency-Key responses past their TTL (hourly, see core.signals).
+    """
+    deleted = purge_expired_keys()
+    return f"Purged {deleted} idempotency keys"
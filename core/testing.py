@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Test case mixin to assert that a block of code stays within a number of queries.
+
+        with self.assertQueryBudget(5):
+            client.get(url)
+
+    `assertEndpointBudget` checks an endpoint twice, with a small and a large page
+    of objects, so a per-object (N+1) query fails even if it fits the budget once.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget, label=''):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        if len(ctx) > budget:
+            queries = '\n'.join(f"  {i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, 1))
+            self.fail(f"{label or 'Block'} ran {len(ctx)} queries, budget is {budget}:\n{queries}")
+
+    def measure_queries(self, client, url, params=None):
+        # start from a cold cache so cached roles/counts don't hide queries
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(url, params or {})
+        self.assertEqual(resp.status_code, 200, getattr(resp, 'data', resp))
+        return len(ctx)
+
+    def assertEndpointBudget(self, client, url, budget, seed, sizes=(1, 10), params=None):
+        """
+        For every n in `sizes` call `seed(n)` to create n more objects and request `url`
+        (a callable receives seed's return value and returns the url, for detail
+        endpoints). Fails if any request exceeds `budget` queries or if the number
+        of queries grows with n.
+        """
+        counts = []
+        for size in sizes:
+            seeded = seed(size)
+            target = url(seeded) if callable(url) else url
+            with self.assertQueryBudget(budget, label=f"GET {target} after seeding {size} objects"):
+                counts.append(self.measure_queries(client, target, params))
+        self.assertEqual(len(set(counts)), 1,
+                         f"GET {target} query count grows with the number of objects: {dict(zip(sizes, counts))}")
@@ -1,6 +1,32 @@
+import csv
+import io
+import json
+import re
+import time
+from decimal import Decimal
+from unittest import mock
+
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import IdempotencyKey
+from core.pagination import estimate_count
+from core.tasks import purge_idempotency_keys
+from core.testing import QueryBudgetMixin
+from core.versioning import version_key
+from customers.models import Customer
+from orders.filters import OrderFilter
+from orders.models import Order, OrderItem
+from orders.tests import BaseAPITestCase
+from products.filters import ProductFilter
+from products.models import Label, Product
 
 class NoRoleBlockedTests(APITestCase):
     def test_user_without_group_or_perms_is_blocked(self):
@@ -8,3 +34,468 @@ class NoRoleBlockedTests(APITestCase):
         self.client.login(username="norole", password="pass")
         resp = self.client.get(reverse("product-list"))
         self.assertIn(resp.status_code, (401, 403))
+
+
+class KeysetPaginationTests(BaseAPITestCase):
+    def walk(self, client, url, params):
+        ids, resp = [], client.get(url, params)
+        pages = [resp]
+        while True:
+            self.assertEqual(resp.status_code, 200, resp.data)
+            ids += [o["id"] for o in resp.data["results"]]
+            if not resp.data["next"]:
+                return ids, pages
+            resp = client.get(resp.data["next"])
+            pages.append(resp)
+
+    def test_orders_cursor_pages_are_stable_with_ties_and_filters(self):
+        """
+        Con ?pagination=cursor las órdenes se recorren por (-created_at, -id) sin repetir
+        ni saltear filas aunque compartan created_at, y respetando los filtros.
+        """
+        same_time = timezone.now()
+        orders = [Order.objects.create(customer=self.cust, status="PAID" if i % 3 else "PENDING") for i in range(25)]
+        Order.objects.filter(id__in=[o.id for o in orders[5:20]]).update(created_at=same_time)
+        expected = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        client = self.auth_client(self.tok_manager)
+        ids, pages = self.walk(client, reverse("order-list"), {"pagination": "cursor"})
+        self.assertEqual(ids, expected)
+        self.assertNotIn("count", pages[0].data)
+
+        # volver a la página anterior devuelve las mismas filas
+        previous = client.get(pages[2].data["previous"])
+        self.assertEqual(previous.data["results"], pages[1].data["results"])
+
+        paid = list(Order.objects.filter(status="PAID").order_by("-created_at", "-id").values_list("id", flat=True))
+        ids, pages = self.walk(client, reverse("order-list"), {"pagination": "cursor", "status": "PAID", "count": "true"})
+        self.assertEqual(ids, paid)
+        self.assertEqual(pages[0].data["count"], len(paid))
+
+        resp = client.get(reverse("order-list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_products_cursor_by_id_with_filter(self):
+        for i in range(12):
+            Product.objects.create(name=f"P{i}", sku=f"SKU-{i}", price=10 + i, stock=1)
+        client = self.auth_client(self.tok_manager)
+        ids, _ = self.walk(client, reverse("product-list"), {"pagination": "cursor", "min_price": 15})
+        self.assertEqual(ids, list(Product.objects.filter(price__gte=15).order_by("id").values_list("id", flat=True)))
+
+
+class EstimatedCountTests(BaseAPITestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(PAGINATION_EXACT_COUNT_THRESHOLD=5)
+    def test_count_is_cached_above_threshold_and_invalidated_on_write(self):
+        """
+        Por encima del umbral el count se marca como estimado y se reutiliza del cache
+        hasta que haya una escritura en la tabla.
+        """
+        for i in range(12):
+            Customer.objects.create(full_name=f"C{i}", email=f"c{i}@example.com")
+        client = self.auth_client(self.tok_manager)
+        url = reverse("customer-list")
+
+        with CaptureQueriesContext(connection) as first:
+            resp = client.get(url)
+        self.assertEqual(resp.data["count"], 13)
+        self.assertEqual(resp["X-Total-Count-Estimated"], "true")
+
+        with CaptureQueriesContext(connection) as cached:
+            resp = client.get(url, {"page": 2})
+        def counts(ctx):
+            return [q for q in ctx.captured_queries if "COUNT(" in q["sql"]]
+        # el count acotado siempre, el COUNT(*) completo solo la primera vez
+        self.assertEqual(len(counts(first)), 2)
+        self.assertEqual(len(counts(cached)), 1)
+        self.assertEqual(resp.data["count"], 13)
+
+        Customer.objects.create(full_name="New", email="new@example.com")
+        self.assertEqual(client.get(url).data["count"], 14)
+
+        # filtros por tablas relacionadas (join o subquery): una escritura en ellas invalida el count
+        label = Label.objects.create(name="promo")
+        self.prod.labels.add(label)
+        for product in (self.prod, self.prod2):
+            for _ in range(6):
+                order = Order.objects.create(customer=self.cust)
+                OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=1)
+        joined = Order.objects.filter(items__product__labels=label).distinct()
+        nested = Order.objects.filter(id__in=OrderItem.objects.filter(product__labels=label).values("order_id"))
+        self.assertEqual(estimate_count(joined), (6, True))
+        self.assertEqual(estimate_count(nested), (6, True))
+        self.prod2.labels.add(label)
+        self.assertEqual(estimate_count(joined), (12, True))
+        self.assertEqual(estimate_count(nested), (12, True))
+
+        # con filtros por debajo del umbral el count es exacto
+        resp = client.get(reverse("order-list"), {"status": "PAID"})
+        self.assertEqual(resp.data["count"], 0)
+        self.assertFalse(resp.has_header("X-Total-Count-Estimated"))
+
+
+class QueryBudgetTests(QueryBudgetMixin, BaseAPITestCase):
+    """
+    Presupuesto de queries por endpoint (auth + roles + count + datos). Si un endpoint
+    supera el presupuesto o sus queries crecen con la cantidad de objetos, el test falla.
+    """
+    BUDGETS = {
+        "product-list": 7,
+        "product-detail": 6,
+        "label-list": 6,
+        "customer-list": 6,
+        "customer-detail": 5,
+        "order-list": 8,
+        "order-detail": 7,
+    }
+
+    def setUp(self):
+        self.client = self.auth_client(self.tok_manager)
+        self.seq = 0
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    def seed_products(self, n, labels_per_product=2):
+        products = []
+        for _ in range(n):
+            i = self.next_seq()
+            product = Product.objects.create(name=f"P{i}", sku=f"SKU-B{i}", price=10, stock=100)
+            product.labels.set([Label.objects.create(name=f"L{i}-{j}") for j in range(labels_per_product)])
+            products.append(product)
+        return products
+
+    def seed_customers(self, n):
+        return [Customer.objects.create(full_name=f"C{i}", email=f"c{i}@example.com")
+                for i in (self.next_seq() for _ in range(n))]
+
+    def seed_orders(self, n, items_per_order=2):
+        orders = []
+        for customer in self.seed_customers(n):
+            order = Order.objects.create(customer=customer)
+            for product in self.seed_products(items_per_order, labels_per_product=0):
+                OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=product.price)
+            orders.append(order)
+        return orders
+
+    def test_list_endpoints_within_budget(self):
+        self.assertEndpointBudget(self.client, reverse("product-list"), self.BUDGETS["product-list"],
+                                  self.seed_products)
+        self.assertEndpointBudget(self.client, reverse("label-list"), self.BUDGETS["label-list"],
+                                  lambda n: self.seed_products(n, labels_per_product=1))
+        self.assertEndpointBudget(self.client, reverse("customer-list"), self.BUDGETS["customer-list"],
+                                  self.seed_customers)
+        self.assertEndpointBudget(self.client, reverse("order-list"), self.BUDGETS["order-list"],
+                                  self.seed_orders)
+
+    def test_detail_endpoints_within_budget(self):
+        self.assertEndpointBudget(self.client, lambda p: reverse("product-detail", args=[p[0].id]),
+                                  self.BUDGETS["product-detail"],
+                                  lambda n: self.seed_products(1, labels_per_product=n))
+        self.assertEndpointBudget(self.client, lambda c: reverse("customer-detail", args=[c[0].id]),
+                                  self.BUDGETS["customer-detail"], self.seed_customers)
+        self.assertEndpointBudget(self.client, lambda o: reverse("order-detail", args=[o[0].id]),
+                                  self.BUDGETS["order-detail"], lambda n: self.seed_orders(1, items_per_order=n))
+
+    def test_label_actions_serialize_with_prefetched_labels(self):
+        product = self.seed_products(1, labels_per_product=5)[0]
+        with self.assertQueryBudget(12, label="POST product labels"):
+            resp = self.client.post(reverse("product-labels", args=[product.id]), {"label_name": "Nueva"}, format="json")
+        self.assertEqual(len(resp.data["labels"]), 6)
+        label_id = resp.data["labels"][0]["id"]
+        resp = self.client.delete(reverse("product-remove-label", args=[product.id, label_id]))
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(len(resp.data["labels"]), 5)
+
+
+class ConditionalGetTests(BaseAPITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_etag_answers_304_without_querying_until_a_write(self):
+        """
+        Con If-None-Match igual al ETag actual se responde 304 sin consultar la tabla;
+        crear/cancelar órdenes cambia el ETag de órdenes y productos.
+        """
+        client = self.auth_client(self.tok_seller)
+        resp = client.get(reverse("product-list"))
+        etag = resp["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(reverse("product-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if "products_" in q["sql"]])
+
+        orders_resp = client.get(reverse("order-list"))
+        resp = client.post(reverse("order-list"),
+                           {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 1}]},
+                           format="json")
+        order_id = resp.data["id"]
+        self.assertEqual(client.get(reverse("product-list"), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(client.get(reverse("order-list"), HTTP_IF_NONE_MATCH=orders_resp["ETag"]).status_code, 200)
+
+        detail = client.get(reverse("order-detail", args=[order_id]))
+        self.assertEqual(client.get(reverse("order-detail", args=[order_id]),
+                                    HTTP_IF_NONE_MATCH=detail["ETag"]).status_code, 304)
+        client.post(reverse("order-cancel", args=[order_id]))
+        resp = client.get(reverse("order-detail", args=[order_id]), HTTP_IF_NONE_MATCH=detail["ETag"])
+        self.assertEqual((resp.status_code, resp.data["status"]), (200, "CANCELLED"))
+
+    def test_last_modified_is_only_sent_once_its_second_is_over(self):
+        """
+        If-Modified-Since responde 304 con la fecha de la última respuesta, pero una
+        escritura en el mismo segundo que esa respuesta no puede quedar oculta: mientras
+        el segundo del último cambio no terminó no se envía Last-Modified ni se respeta
+        If-Modified-Since.
+        """
+        client = self.auth_client(self.tok_manager)
+        url = reverse("customer-list")
+        stamp = (int(time.time()) - 10) * 1_000_000
+        cache.set(version_key(Customer), stamp, timeout=None)
+
+        with mock.patch("core.cache.time") as clock:
+            clock.time.return_value = stamp / 1_000_000 + 0.5
+            resp = client.get(url)
+            self.assertFalse(resp.has_header("Last-Modified"))
+            self.assertEqual(client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(stamp // 1_000_000)).status_code, 200)
+
+            clock.time.return_value = stamp / 1_000_000 + 1
+            resp = client.get(url)
+            self.assertEqual(client.get(url, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"]).status_code, 304)
+
+            # escritura en el mismo segundo que la respuesta anterior
+            client.post(url, {"full_name": "Bob", "email": "bob@example.com"}, format="json")
+            cache.set(version_key(Customer), stamp + 1_000_000 + 200, timeout=None)
+            resp = client.get(url, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"])
+            self.assertEqual(resp.status_code, 200)
+            self.assertFalse(resp.has_header("Last-Modified"))
+            self.assertIn("bob@example.com", [c["email"] for c in resp.data["results"]])
+
+    @override_settings(SHARED_CACHE=False)
+    def test_version_based_features_are_off_without_a_shared_cache(self):
+        """
+        Sin un caché compartido (CACHE_URL) cada proceso tendría sus propias versiones:
+        no se cachean respuestas ni se envían ETag/Last-Modified, y el bulk async se rechaza.
+        """
+        client = self.auth_client(self.tok_manager)
+        for _ in range(2):
+            resp = client.get(reverse("product-list"))
+            self.assertEqual(resp.status_code, 200)
+            self.assertFalse(resp.has_header("X-Cache"))
+            self.assertFalse(resp.has_header("ETag"))
+            self.assertFalse(resp.has_header("Last-Modified"))
+
+        orders = [{"customer": self.cust.id, "items": [{"product": self.prod2.id, "quantity": 1}]}]
+        resp = client.post(reverse("order-bulk") + "?async=true", {"orders": orders}, format="json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("async", resp.data)
+
+
+class StreamingListTests(BaseAPITestCase):
+    def test_ndjson_streams_filtered_orders_with_chunked_prefetch(self):
+        """
+        ?format=ndjson devuelve todas las órdenes filtradas (sin paginar) en streaming,
+        con el prefetch de items hecho por bloques y no por orden.
+        """
+        for i in range(7):
+            order = Order.objects.create(customer=self.cust, status="PAID" if i % 2 else "PENDING")
+            OrderItem.objects.create(order=order, product=self.prod, quantity=1, unit_price=100)
+        client = self.auth_client(self.tok_manager)
+
+        with override_settings(STREAMING_CHUNK_SIZE=2), CaptureQueriesContext(connection) as ctx:
+            resp = client.get(reverse("order-list"), {"format": "ndjson", "status": "PENDING", "ordering": "id"})
+            body = b"".join(resp.streaming_content).decode()
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith("application/x-ndjson"))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["id"] for r in rows],
+                         list(Order.objects.filter(status="PENDING").order_by("id").values_list("id", flat=True)))
+        self.assertEqual(rows[0]["items"][0]["product_name"], self.prod.name)
+        item_queries = [q for q in ctx.captured_queries if 'FROM "orders_orderitem"' in q["sql"]]
+        self.assertEqual(len(item_queries), 2)  # 4 órdenes en bloques de 2
+
+    def test_csv_streams_products_per_role(self):
+        """
+        ?format=csv devuelve los productos con encabezado; los Viewers no ven el stock.
+        """
+        resp = self.auth_client(self.tok_manager).get(reverse("product-list"), {"format": "csv"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('filename="product.csv"', resp["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(b"".join(resp.streaming_content).decode())))
+        self.assertEqual([r["sku"] for r in rows], [self.prod.sku, self.prod2.sku])
+        self.assertEqual(rows[0]["stock"], "10")
+
+        resp = self.auth_client(self.tok_viewer).get(reverse("product-list"), {"format": "csv"})
+        header = b"".join(resp.streaming_content).decode().splitlines()[0]
+        self.assertNotIn("stock", header.split(","))
+
+
+class IndexUsageTests(BaseAPITestCase):
+    """
+    EXPLAIN de los filtros/órdenes reales de la API sobre datos sembrados: ninguno
+    debe terminar en un recorrido secuencial de la tabla. En PostgreSQL se
+    desactiva enable_seqscan, así que solo aparece un Seq Scan si no hay un índice
+    utilizable; en SQLite se verifican los casos que no dependen de UPPER()/trigramas.
+    """
+
+    def seed(self):
+        customers = Customer.objects.bulk_create([
+            Customer(full_name=f"Cliente {i}", email=f"cliente{i}@example.com") for i in range(50)])
+        Product.objects.bulk_create([
+            Product(name=f"Producto {i}", sku=f"IDX-{i}", price=10, stock=10) for i in range(200)])
+        Order.objects.bulk_create([
+            Order(customer=customers[i % 50], status=("PENDING", "PAID", "CANCELLED")[i % 3]) for i in range(600)])
+
+    def seq_scans(self, queryset):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return re.findall(r"Seq Scan on (\w+)", queryset.explain())
+        # SQLite: "SCAN <table>" without "USING ... INDEX" reads the whole table
+        return re.findall(r"\bSCAN (\w+)\s*$", queryset.explain(), re.MULTILINE)
+
+    def test_filters_use_indexes(self):
+        self.seed()
+        orders = Order.objects.all()
+        cases = [
+            ("orden por defecto", orders.order_by("-created_at")[:10], False),
+            ("status + rango de fechas", OrderFilter(
+                {"status": "PAID", "date_from": "2025-01-01", "date_to": "2025-12-31"},
+                queryset=orders).qs.order_by("-created_at")[:10], False),
+            ("rango de fechas", OrderFilter({"date_from": "2025-01-01"}, queryset=orders).qs.order_by("-created_at")[:10],
+             False),
+            ("órdenes de un cliente", orders.filter(customer=self.cust).order_by("created_at")[:10], False),
+            ("customer_email", Customer.objects.filter(email__icontains="liente1"), True),
+            ("tag (sku iexact)", ProductFilter({"tag": "idx-7"}, queryset=Product.objects.all()).qs, True),
+        ]
+        for label, queryset, postgres_only in cases:
+            if postgres_only and connection.vendor != "postgresql":
+                continue
+            with self.subTest(label):
+                self.assertEqual(self.seq_scans(queryset), [], queryset.explain())
+
+
+class IdempotencyKeyTests(BaseAPITestCase):
+    def test_repeats_get_the_stored_response(self):
+        """
+        Repetir POST /orders/ con el mismo Idempotency-Key devuelve la misma respuesta
+        sin crear otra orden ni descontar stock; otro cuerpo con la misma clave da 422.
+        """
+        client = self.auth_client(self.tok_manager)
+        payload = {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 2}]}
+        first = client.post(reverse("order-list"), payload, format="json", HTTP_IDEMPOTENCY_KEY="k-1")
+        again = client.post(reverse("order-list"), payload, format="json", HTTP_IDEMPOTENCY_KEY="k-1")
+        self.assertEqual((first.status_code, again.status_code), (201, 201))
+        self.assertEqual(json.loads(again.content), json.loads(first.content))
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 8)
+
+        other = dict(payload, items=[{"product": self.prod.id, "quantity": 1}])
+        resp = client.post(reverse("order-list"), other, format="json", HTTP_IDEMPOTENCY_KEY="k-1")
+        self.assertEqual(resp.status_code, 422)
+
+        # cancelar dos veces con la misma clave repone una sola vez
+        url = reverse("order-cancel", args=[first.data["id"]])
+        for _ in range(2):
+            self.assertEqual(client.post(url, HTTP_IDEMPOTENCY_KEY="c-1").data["status"], "CANCELLED")
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 10)
+
+        # los errores de validación no se guardan; las claves vencidas se purgan
+        invalid = {"customer": self.cust.id, "items": [{"product": 999999, "quantity": 1}]}
+        resp = client.post(reverse("order-list"), invalid, format="json", HTTP_IDEMPOTENCY_KEY="k-2")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(set(IdempotencyKey.objects.values_list("key", flat=True)), {"k-1", "c-1"})
+        IdempotencyKey.objects.filter(key="k-1").update(expires_at=timezone.now())
+        purge_idempotency_keys()
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["c-1"])
+
+
+class AsyncReadViewTests(BaseAPITestCase):
+    def test_async_endpoints_match_drf_output(self):
+        """
+        Las vistas async devuelven lo mismo que los endpoints DRF (modo cursor),
+        tanto el listado como el detalle.
+        """
+        client = self.auth_client(self.tok_manager)
+        self.prod.labels.add(Label.objects.create(name="gamer"))
+        order = client.post(reverse("order-list"), {
+            "customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 2}],
+        }, format="json").data
+
+        cases = [
+            ("product", self.prod.id, {}),
+            ("label", self.prod.labels.get().id, {}),
+            ("customer", self.cust.id, {}),
+            ("order", order["id"], {"status": "PENDING"}),
+        ]
+        for name, pk, params in cases:
+            drf = client.get(reverse(f"{name}-list"), {"pagination": "cursor", **params})
+            resp = client.get(reverse(f"{name}-async-list"), params)
+            self.assertEqual(resp.status_code, 200, name)
+            self.assertEqual(resp.json()["results"], drf.json()["results"], name)
+
+            detail = client.get(reverse(f"{name}-async-detail", args=[pk]))
+            self.assertEqual(detail.json(), client.get(reverse(f"{name}-detail", args=[pk])).json(), name)
+        self.assertEqual(client.get(reverse("product-async-detail", args=[999999])).status_code, 404)
+
+    def test_async_list_honours_ordering_like_drf(self):
+        """
+        ?ordering= (con la misma lista de campos permitidos) y el orden por relevancia
+        de ?search= dan el mismo orden en la vista async que en el endpoint DRF.
+        """
+        client = self.auth_client(self.tok_manager)
+        for quantity in (3, 1, 2):
+            client.post(reverse("order-list"), {
+                "customer": self.cust.id, "items": [{"product": self.prod2.id, "quantity": quantity}],
+            }, format="json")
+        Product.objects.create(name="Mousepad", sku="PAD-001", price=5, stock=7)
+
+        cases = [
+            ("order", {"ordering": "-total_amount"}),
+            ("order", {"ordering": "customer__email"}),  # no permitido: se ignora
+            ("product", {"ordering": "-stock"}),
+            ("product", {"search": "mou"}),
+        ]
+        for name, params in cases:
+            drf = client.get(reverse(f"{name}-list"), {"pagination": "cursor", **params}).json()["results"]
+            resp = client.get(reverse(f"{name}-async-list"), params)
+            self.assertEqual(resp.status_code, 200, params)
+            self.assertEqual([r["id"] for r in resp.json()["results"]], [r["id"] for r in drf], params)
+        totals = [o["total_amount"] for o in client.get(reverse("order-async-list"), {"ordering": "-total_amount"})
+                  .json()["results"]]
+        self.assertEqual(totals, sorted(totals, key=Decimal, reverse=True))
+
+    def test_async_auth_roles_and_cursor(self):
+        """
+        Sin token -> 401; sin rol -> 403; el Viewer no ve stock; el cursor pagina.
+        """
+        resp = self.client.get(reverse("product-async-list"))
+        self.assertEqual(resp.status_code, 401)
+        self.assertIn("WWW-Authenticate", resp)
+
+        norole = User.objects.create_user(username="norole", password="pass")
+        from orders.tests import token_for
+        self.assertEqual(self.auth_client(token_for(norole)).get(reverse("product-async-list")).status_code, 403)
+
+        admin = User.objects.create_superuser(username="root", password="pass")
+        self.assertEqual(self.auth_client(token_for(admin)).get(reverse("product-async-list")).status_code, 200)
+
+        results = self.auth_client(self.tok_viewer).get(reverse("product-async-list")).json()["results"]
+        self.assertTrue(results)
+        self.assertTrue(all("stock" not in p for p in results))
+
+        Product.objects.bulk_create([Product(name=f"P{i}", sku=f"ASY-{i}", price=1, stock=1) for i in range(10)])
+        client = self.auth_client(self.tok_manager)
+        first = client.get(reverse("product-async-list"), {"count": "true"}).json()
+        self.assertEqual(first["count"], 12)
+        second = client.get(first["next"]).json()
+        self.assertEqual([p["id"] for p in first["results"] + second["results"]],
+                         list(Product.objects.order_by("id").values_list("id", flat=True)))
+        self.assertIsNone(second["next"])
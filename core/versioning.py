@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+# apps whose tables carry a version stamp
+VERSIONED_APPS = ('products', 'customers', 'orders')
+
+
+def version_key(model):
+    return f"table-version:{model._meta.label_lower}"
+
+
+def get_versions(*models):
+    """
+    Current version stamp (microseconds since the epoch of the last write) of each
+    model's table, in the same order. Tables never written since the cache was
+    cleared start at "now", which is conservative.
+    """
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = time.time_ns() // 1000
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        versions.update(cache.get_many(missing))
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+def _bump(keys):
+    now = time.time_ns() // 1000
+    current = cache.get_many(keys)
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, timeout=None)
+
+
+def bump_version(*models):
+    """
+    Mark the tables of `models` as changed. Call it after bulk writes that don't
+    send model signals (queryset.update(), bulk_create()...). Inside a transaction
+    the stamp is bumped again on commit, so nothing cached in between survives.
+    """
+    keys = list({version_key(model) for model in models})
+    if not keys:
+        return
+    _bump(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def _on_write(sender, **kwargs):
+    if sender._meta.app_label in VERSIONED_APPS:
+        bump_version(sender)
+
+
+def _on_m2m_write(sender, instance, action, model, **kwargs):
+    if action.startswith('post_') and sender._meta.app_label in VERSIONED_APPS:
+        bump_version(sender, type(instance), model)
+
+
+def connect_version_signals():
+    post_save.connect(_on_write, dispatch_uid='core.versioning.post_save')
+    post_delete.connect(_on_write, dispatch_uid='core.versioning.post_delete')
+    m2m_changed.connect(_on_m2m_write, dispatch_uid='core.versioning.m2m_changed')
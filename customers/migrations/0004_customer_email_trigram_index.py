@@ -0,0 +1,24 @@
+# Trigram index for the customer_email (email__icontains) filter. PostgreSQL only:
+# on other databases both operations are no-ops.
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.db import PostgresOnlyRunSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_rename_first_name_customer_full_name_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # icontains is compiled to UPPER("email"::text) LIKE UPPER(%s), so the index is on that expression
+        PostgresOnlyRunSQL(
+            sql='CREATE INDEX IF NOT EXISTS customer_email_upper_trgm_idx '
+                'ON customers_customer USING gin ((UPPER(email::text)) gin_trgm_ops);',
+            reverse_sql='DROP INDEX IF EXISTS customer_email_upper_trgm_idx;',
+        ),
+    ]
@@ -1,7 +1,12 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import CustomerViewSet
+from .views import AsyncCustomerView, CustomerViewSet
 
 router = DefaultRouter()
 router.register(r'customers', CustomerViewSet)
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls + [
+    # async read-only endpoints (core.async_views), for ASGI deployments
+    path('async/customers/', AsyncCustomerView.as_view(), name='customer-async-list'),
+    path('async/customers/<int:pk>/', AsyncCustomerView.as_view(), name='customer-async-detail'),
+]
@@ -1,8 +1,16 @@
 from rest_framework import viewsets
+from core.async_views import AsyncReadOnlyView
+from core.cache import ConditionalGetMixin
+from core.streaming import StreamingListMixin
 from .models import Customer
 from .serializers import CustomerSerializer
 
 # Create your views here.
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(StreamingListMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
-    serializer_class = CustomerSerializer
\ No newline at end of file
+    serializer_class = CustomerSerializer
+
+
+class AsyncCustomerView(AsyncReadOnlyView):
+    queryset = Customer.objects.all()
+    serializer_class = CustomerSerializer
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import OutboxEvent
+
+# Register your models here.
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'sequence', 'event_type', 'aggregate_id', 'created_at', 'published_at')
+    list_filter = ('event_type',)
@@ -0,0 +1,12 @@
+import django_filters
+from .models import OutboxEvent
+
+
+class EventFilter(django_filters.FilterSet):
+    since = django_filters.NumberFilter(field_name='sequence', lookup_expr='gt', label='Only events after this sequence')
+    event_type = django_filters.ChoiceFilter(choices=OutboxEvent.EVENT_TYPE_CHOICES)
+    order = django_filters.NumberFilter(field_name='aggregate_id')
+
+    class Meta:
+        model = OutboxEvent
+        fields = ['since', 'event_type', 'order']
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:57
+
+from django.db import migrations, models
+
+
+def number_published_events(apps, schema_editor):
+    # events published before sequences existed keep their id order in the feed
+    OutboxEvent = apps.get_model('events', 'OutboxEvent')
+    OutboxSequence = apps.get_model('events', 'OutboxSequence')
+    last_value = 0
+    published = OutboxEvent.objects.filter(published_at__isnull=False).order_by('id').only('id')
+    for last_value, event in enumerate(published.iterator(), start=1):
+        OutboxEvent.objects.filter(id=event.id).update(sequence=last_value)
+    OutboxSequence.objects.create(pk=1, last_value=last_value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='sequence',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(number_published_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+from django.db import models
+from django.db.models import Q
+
+
+# Create your models here.
+class OutboxEvent(models.Model):
+    """
+    Order lifecycle event, written in the same transaction as the change it
+    describes. events.tasks.drain_outbox publishes the unpublished ones, giving
+    each a `sequence`, and GET /api/events/ serves the published ones by sequence.
+    """
+    ORDER_CREATED = 'order.created'
+    ORDER_PAID = 'order.paid'
+    ORDER_CANCELLED = 'order.cancelled'
+    EVENT_TYPE_CHOICES = [
+        (ORDER_CREATED, 'Order created'),
+        (ORDER_PAID, 'Order paid'),
+        (ORDER_CANCELLED, 'Order cancelled'),
+    ]
+    event_type = models.CharField(max_length=50, choices=EVENT_TYPE_CHOICES)
+    aggregate_id = models.BigIntegerField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    # feed order, assigned on publish in commit order (see OutboxSequence)
+    sequence = models.BigIntegerField(null=True, blank=True, unique=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # the drain only looks for unpublished events, in id order
+            models.Index(fields=['id'], condition=Q(published_at__isnull=True), name='outbox_unpublished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.event_type} {self.aggregate_id}"
+
+
+class OutboxSequence(models.Model):
+    """
+    Last `sequence` given to a published event (a single row). The drain keeps it
+    locked until its batch commits, so sequences become visible in order and a
+    feed reader that has seen sequence N will never find a new event below N.
+    """
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.last_value)
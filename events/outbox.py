@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent, OutboxSequence
+from .sinks import get_sink
+
+
+def order_event(event_type, order, items=None):
+    """
+    Unsaved OutboxEvent for `order`. `items` (OrderItems) are included in the
+    payload when given, for order.created.
+    """
+    payload = {
+        'order': order.id,
+        'customer': order.customer_id,
+        'status': order.status,
+        'total_amount': str(order.total_amount),
+        'items_count': order.items_count,
+    }
+    if items is not None:
+        payload['items'] = [
+            {'product': item.product_id, 'quantity': item.quantity, 'unit_price': str(item.unit_price)}
+            for item in items
+        ]
+    return OutboxEvent(event_type=event_type, aggregate_id=order.id, payload=payload)
+
+
+def record_events(events):
+    """
+    Insert the events in one query. Call it inside the transaction of the change.
+    """
+    if events:
+        OutboxEvent.objects.bulk_create(events)
+
+
+def event_message(event):
+    return {
+        'id': event.id,
+        'sequence': event.sequence,
+        'event_type': event.event_type,
+        'aggregate_id': event.aggregate_id,
+        'payload': event.payload,
+        'created_at': event.created_at.isoformat(),
+    }
+
+
+def publish_pending(batch_size=None, sink=None):
+    """
+    Publish unpublished events to the sink in id order, `batch_size` per
+    transaction, mark them published and number them with consecutive
+    `sequence` values. A batch whose publish fails is rolled back and sent again
+    on the next run (at-least-once).
+
+    The OutboxSequence row is locked for the whole batch, so concurrent drains
+    publish one batch at a time and sequences commit in increasing order.
+    Returns the number of published events.
+    """
+    batch_size = batch_size or settings.EVENTS_DRAIN_BATCH_SIZE
+    sink = sink or get_sink()
+    published = 0
+    while True:
+        with transaction.atomic():
+            counter, _ = OutboxSequence.objects.select_for_update().get_or_create(pk=1)
+            events = list(OutboxEvent.objects.select_for_update(skip_locked=True)
+                          .filter(published_at__isnull=True).order_by('id')[:batch_size])
+            if not events:
+                return published
+            now = timezone.now()
+            for sequence, event in enumerate(events, start=counter.last_value + 1):
+                event.sequence, event.published_at = sequence, now
+            sink.publish([event_message(event) for event in events])
+            OutboxEvent.objects.bulk_update(events, ['sequence', 'published_at'])
+            counter.last_value += len(events)
+            counter.save(update_fields=['last_value'])
+        published += len(events)
+        if len(events) < batch_size:
+            return published
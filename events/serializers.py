@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from .models import OutboxEvent
+
+
+class OutboxEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OutboxEvent
+        fields = ['id', 'sequence', 'event_type', 'aggregate_id', 'payload', 'created_at']
@@ -0,0 +1,59 @@
+import json
+
+from django.conf import settings
+
+
+class MemorySink:
+    """
+    Keeps the published messages in `MemorySink.messages` (tests).
+    """
+    messages = []
+
+    def publish(self, messages):
+        MemorySink.messages.extend(messages)
+
+
+class FileSink:
+    """
+    Appends the messages, one json document per line, to EVENTS_FILE_PATH.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.EVENTS_FILE_PATH
+
+    def publish(self, messages):
+        with open(self.path, 'a', encoding='utf-8') as output:
+            output.writelines(json.dumps(message, separators=(',', ':')) + '\n' for message in messages)
+
+
+class RedisStreamSink:
+    """
+    XADDs every message to the EVENTS_REDIS_STREAM stream (capped at about
+    EVENTS_REDIS_STREAM_MAXLEN entries) in one pipeline. Consumers read it with
+    XREAD / consumer groups; the event id is in the `id` field.
+    """
+
+    def __init__(self, url=None, stream=None, maxlen=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.EVENTS_REDIS_URL)
+        self.stream = stream or settings.EVENTS_REDIS_STREAM
+        self.maxlen = maxlen or settings.EVENTS_REDIS_STREAM_MAXLEN
+
+    def publish(self, messages):
+        pipeline = self.client.pipeline(transaction=False)
+        for message in messages:
+            pipeline.xadd(self.stream, {
+                'id': message['id'],
+                'event_type': message['event_type'],
+                'aggregate_id': message['aggregate_id'],
+                'data': json.dumps(message, separators=(',', ':')),
+            }, maxlen=self.maxlen, approximate=True)
+        pipeline.execute()
+
+
+SINKS = {'memory': MemorySink, 'file': FileSink, 'redis': RedisStreamSink}
+
+
+def get_sink():
+    return SINKS[settings.EVENTS_SINK]()
@@ -0,0 +1,12 @@
+from celery import shared_task
+
+from .outbox import publish_pending
+
+
+@shared_task
+def drain_outbox():
+    """
+    Publish the pending outbox events (every EVENTS_DRAIN_INTERVAL_SECONDS, see core.signals).
+    """
+    published = publish_pending()
+    return f"Published {published} events"
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, viewsets
+
+from core.pagination import KeysetPagination
+from .filters import EventFilter
+from .models import OutboxEvent
+from .serializers import OutboxEventSerializer
+
+
+class EventFeedPagination(KeysetPagination):
+    @property
+    def page_size(self):
+        return settings.EVENTS_FEED_PAGE_SIZE
+
+
+class EventViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Published order lifecycle events in `sequence` order. Poll with
+    `?since=<last sequence seen>` or follow the `next` cursor. Sequences are
+    assigned by the drain in commit order (see events.outbox.publish_pending), so
+    an event that commits late still comes after everything already served.
+    """
+    serializer_class = OutboxEventSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = EventFilter
+    pagination_class = EventFeedPagination
+    ordering = ['sequence']
+
+    def get_queryset(self):
+        return OutboxEvent.objects.filter(sequence__isnull=False)
@@ -8,10 +8,16 @@ class OrderItemInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'customer', 'status', 'created_at', 'total')
+    list_display = ('id', 'customer', 'status', 'created_at', 'total_amount', 'items_count')
     search_fields = ('customer__full_name', 'id')
     list_filter = ('status', 'created_at')
     inlines = [OrderItemInline]
+    readonly_fields = ('total_amount', 'items_count')
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # items may have been edited inline
+        form.instance.refresh_totals()
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
@@ -0,0 +1,187 @@
+"""
+Compact, self-describing columnar format for order analytics (".scol").
+
+Layout: MAGIC followed by blocks. Every block is a little-endian uint32 with the
+length of a JSON header, the header itself and, for "chunk" blocks, the raw column
+buffers in schema order:
+
+    {"type": "schema", "table": ..., "columns": [{"name", "dtype", "logical", ...}]}
+    {"type": "chunk", "rows": n, "nbytes": [...]}     (repeated)
+    {"type": "end", "rows": total}
+
+`dtype` is a NumPy type string ('<i8', '<i4', '|u1'), so every buffer can be loaded
+with numpy.frombuffer. Logical types:
+  - decimal:   integer scaled by 10**scale
+  - timestamp: microseconds since the Unix epoch, UTC ('datetime64[us]')
+  - enum:      uint8 code into `categories`
+  - string:    '<i8' offsets (rows + 1) followed by the utf-8 bytes
+"""
+import array
+import json
+import struct
+import sys
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+MAGIC = b'SCOL\x01'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_LENGTH = struct.Struct('<I')
+# numpy type string -> array typecode
+_TYPECODES = {'<i8': 'q', '<i4': 'i', '|u1': 'B'}
+
+
+def int_column(name, dtype='<i8'):
+    return {'name': name, 'dtype': dtype, 'logical': 'int'}
+
+
+def decimal_column(name, scale=2):
+    return {'name': name, 'dtype': '<i8', 'logical': 'decimal', 'scale': scale}
+
+
+def timestamp_column(name):
+    return {'name': name, 'dtype': '<i8', 'logical': 'timestamp', 'unit': 'us', 'tz': 'UTC'}
+
+
+def enum_column(name, categories):
+    return {'name': name, 'dtype': '|u1', 'logical': 'enum', 'categories': list(categories)}
+
+
+def string_column(name):
+    return {'name': name, 'dtype': '<i8', 'logical': 'string'}
+
+
+def _to_bytes(typecode, values):
+    buf = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        buf.byteswap()
+    return buf.tobytes()
+
+
+def _from_bytes(typecode, data):
+    buf = array.array(typecode)
+    buf.frombytes(data)
+    if sys.byteorder == 'big':
+        buf.byteswap()
+    return buf
+
+
+def _encode(column, values):
+    logical = column['logical']
+    typecode = _TYPECODES[column['dtype']]
+    if logical == 'decimal':
+        values = [int(Decimal(v).scaleb(column['scale'])) for v in values]
+    elif logical == 'timestamp':
+        values = [(v - EPOCH) // timedelta(microseconds=1) for v in values]
+    elif logical == 'enum':
+        codes = {c: i for i, c in enumerate(column['categories'])}
+        values = [codes[v] for v in values]
+    elif logical == 'string':
+        data = [(v or '').encode() for v in values]
+        offsets = [0]
+        for item in data:
+            offsets.append(offsets[-1] + len(item))
+        return _to_bytes(typecode, offsets) + b''.join(data)
+    return _to_bytes(typecode, values)
+
+
+class ColumnarWriter:
+    """
+    Write rows (tuples in schema order) to a binary file object, one chunk at a time.
+    """
+
+    def __init__(self, fh, table, columns):
+        self.fh = fh
+        self.columns = columns
+        self.rows = 0
+        fh.write(MAGIC)
+        self._write_block({'type': 'schema', 'table': table, 'columns': columns})
+
+    def _write_block(self, header, buffers=()):
+        raw = json.dumps(header, separators=(',', ':')).encode()
+        self.fh.write(_LENGTH.pack(len(raw)))
+        self.fh.write(raw)
+        for buf in buffers:
+            self.fh.write(buf)
+
+    def write_chunk(self, rows):
+        if not rows:
+            return
+        buffers = [_encode(column, values) for column, values in zip(self.columns, zip(*rows))]
+        self._write_block({'type': 'chunk', 'rows': len(rows), 'nbytes': [len(b) for b in buffers]}, buffers)
+        self.rows += len(rows)
+
+    def close(self):
+        self._write_block({'type': 'end', 'rows': self.rows})
+
+
+def _read_blocks(fh):
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a columnar export file")
+    while True:
+        length = fh.read(_LENGTH.size)
+        if not length:
+            raise ValueError("Truncated columnar export file")
+        header = json.loads(fh.read(_LENGTH.unpack(length)[0]))
+        buffers = [fh.read(n) for n in header.get('nbytes', [])]
+        yield header, buffers
+        if header['type'] == 'end':
+            return
+
+
+def _decode_stdlib(column, data, rows):
+    logical = column['logical']
+    typecode = _TYPECODES[column['dtype']]
+    if logical == 'string':
+        offsets = _from_bytes(typecode, data[:(rows + 1) * 8])
+        payload = data[(rows + 1) * 8:]
+        return [payload[offsets[i]:offsets[i + 1]].decode() for i in range(rows)]
+    values = _from_bytes(typecode, data)
+    if logical == 'decimal':
+        return [Decimal(v).scaleb(-column['scale']) for v in values]
+    if logical == 'timestamp':
+        return [EPOCH + timedelta(microseconds=v) for v in values]
+    if logical == 'enum':
+        return [column['categories'][v] for v in values]
+    return list(values)
+
+
+def _decode_numpy(np, column, data, rows):
+    if column['logical'] == 'string':
+        offsets = np.frombuffer(data[:(rows + 1) * 8], dtype='<i8')
+        payload = data[(rows + 1) * 8:]
+        return np.array([payload[offsets[i]:offsets[i + 1]].decode() for i in range(rows)], dtype=object)
+    values = np.frombuffer(data, dtype=column['dtype'])
+    if column['logical'] == 'timestamp':
+        return values.view('datetime64[us]')
+    # decimals stay scaled integers and enums stay codes, see the schema for scale/categories
+    return values
+
+
+def read_columnar(path, use_numpy=False):
+    """
+    Load a columnar export. Returns (schema, {column name: values}).
+    With use_numpy=True every column is a NumPy array, otherwise a list of Python
+    values (Decimal, aware datetime, str, int).
+    """
+    np = None
+    if use_numpy:
+        import numpy as np
+
+    with open(path, 'rb') as fh:
+        blocks = _read_blocks(fh)
+        schema, _ = next(blocks)
+        parts = {column['name']: [] for column in schema['columns']}
+        for header, buffers in blocks:
+            if header['type'] != 'chunk':
+                continue
+            for column, data in zip(schema['columns'], buffers):
+                if np is not None:
+                    parts[column['name']].append(_decode_numpy(np, column, data, header['rows']))
+                else:
+                    parts[column['name']].extend(_decode_stdlib(column, data, header['rows']))
+
+    if np is not None:
+        dtypes = {c['name']: c['dtype'] for c in schema['columns']}
+        parts = {name: np.concatenate(chunks) if chunks else np.empty(0, dtype=dtypes[name])
+                 for name, chunks in parts.items()}
+    return schema, parts
@@ -0,0 +1,115 @@
+import csv
+import os
+import tempfile
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+
+from .columnar import ColumnarWriter, decimal_column, enum_column, int_column, string_column, timestamp_column
+from .models import Order, OrderItem
+
+CSV_HEADER = ['Order ID', 'Customer Email', 'Items Count', 'Total Amount', 'Status', 'Created At']
+
+ORDER_COLUMNS = [
+    int_column('id'),
+    int_column('customer_id'),
+    string_column('customer_email'),
+    int_column('items_count', dtype='<i4'),
+    decimal_column('total_amount', scale=2),
+    enum_column('status', [value for value, _ in Order.STATUS_CHOICES]),
+    timestamp_column('created_at'),
+]
+ORDER_ITEM_COLUMNS = [
+    int_column('id'),
+    int_column('order_id'),
+    int_column('product_id'),
+    int_column('quantity', dtype='<i4'),
+    decimal_column('unit_price', scale=2),
+]
+
+
+def orders_in_window(since, until):
+    """
+    Orders created in [since, until), ordered by id.
+    """
+    return Order.objects.filter(created_at__gte=since, created_at__lt=until).order_by('id')
+
+
+def csv_rows(orders, chunk_size=None):
+    """
+    Yield one CSV row per order using a single query (customer email joined,
+    items count and total read from the stored columns) and a server-side cursor.
+    """
+    chunk_size = chunk_size or settings.ORDERS_EXPORT_CHUNK_SIZE
+    rows = orders.values_list('id', 'customer__email', 'items_count', 'total_amount', 'status', 'created_at')
+    for order_id, email, items_count, total_amount, status, created_at in rows.iterator(chunk_size=chunk_size):
+        yield [order_id, email, items_count, total_amount, status, created_at.strftime('%Y-%m-%d %H:%M:%S')]
+
+
+@contextmanager
+def atomic_output(path, mode='w', **kwargs):
+    """
+    Open a temp file next to `path` and rename it into place only if the block
+    finishes without errors, so readers never see a half written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, **kwargs) as fh:
+            yield fh
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_orders_csv(path, orders, header=True, chunk_size=None):
+    """
+    Stream `orders` into a CSV at `path` (written atomically). Returns the number of rows.
+    """
+    count = 0
+    with atomic_output(path, newline='') as fh:
+        writer = csv.writer(fh)
+        if header:
+            writer.writerow(CSV_HEADER)
+        for row in csv_rows(orders, chunk_size=chunk_size):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_columnar(path, table, columns, rows, chunk_size=None):
+    """
+    Write a values_list queryset (fields in `columns` order) to a columnar file at
+    `path`, reading and encoding one chunk at a time. Returns the number of rows.
+    """
+    chunk_size = chunk_size or settings.ORDERS_EXPORT_CHUNK_SIZE
+    iterator = rows.iterator(chunk_size=chunk_size)
+    with atomic_output(path, mode='wb') as fh:
+        writer = ColumnarWriter(fh, table, columns)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            writer.write_chunk(chunk)
+        writer.close()
+    return writer.rows
+
+
+def write_orders_columnar(orders_path, items_path, orders, chunk_size=None):
+    """
+    Export `orders` and their items as two columnar files. Returns (orders, items) row counts.
+    """
+    order_rows = orders.values_list('id', 'customer_id', 'customer__email', 'items_count',
+                                    'total_amount', 'status', 'created_at')
+    item_rows = (OrderItem.objects.filter(order__in=orders.values('id')).order_by('id')
+                 .values_list('id', 'order_id', 'product_id', 'quantity', 'unit_price'))
+    return (
+        write_columnar(orders_path, 'orders', ORDER_COLUMNS, order_rows, chunk_size=chunk_size),
+        write_columnar(items_path, 'order_items', ORDER_ITEM_COLUMNS, item_rows, chunk_size=chunk_size),
+    )
@@ -6,7 +6,9 @@ class OrderFilter(django_filters.FilterSet):
     status = django_filters.ChoiceFilter(choices=Order.STATUS_CHOICES)
     date_from = django_filters.DateFilter(field_name='created_at', lookup_expr='gte')
     date_to = django_filters.DateFilter(field_name='created_at', lookup_expr='lte')
+    min_total = django_filters.NumberFilter(field_name='total_amount', lookup_expr='gte')
+    max_total = django_filters.NumberFilter(field_name='total_amount', lookup_expr='lte')
 
     class Meta:
         model = Order
-        fields = ['customer_email', 'status', 'date_from', 'date_to']
+        fields = ['customer_email', 'status', 'date_from', 'date_to', 'min_total', 'max_total']
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Backfill the stored total_amount/items_count of existing orders from their items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of orders updated per UPDATE statement')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+
+        # walk the table by primary key ranges so each UPDATE stays short
+        while True:
+            ids = list(Order.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            updated += Order.objects.filter(id__gte=ids[0], id__lte=ids[-1]).refresh_totals()
+            last_id = ids[-1]
+            self.stdout.write(f'Updated {updated} orders...')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled totals for {updated} orders.'))
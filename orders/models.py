@@ -1,10 +1,27 @@
 from django.db import models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from products.models import Product
 from customers.models import Customer
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
 
+class OrderQuerySet(models.QuerySet):
+    def refresh_totals(self):
+        """
+        Recompute the stored total_amount/items_count of every order in the queryset
+        from its items, in a single UPDATE.
+        """
+        items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        total = items.annotate(total=Sum(OrderItem.subtotal_expression())).values('total')
+        count = items.annotate(count=Count('id')).values('count')
+        return self.update(
+            total_amount=Coalesce(Subquery(total), Value(Decimal('0.00')), output_field=DecimalField()),
+            items_count=Coalesce(Subquery(count), Value(0)),
+        )
+
+
 # Create your models here.
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -15,10 +32,31 @@ class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='orders')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     created_at = models.DateTimeField(auto_now_add=True)
+    # bumped on every status change, the sales rollup (reports.tasks) uses it to find touched days
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # denormalized from the items, kept in sync on create (see OrderSerializer.create)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    items_count = models.PositiveIntegerField(default=0)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # default list ordering, and date_from/date_to without status
+            models.Index(fields=['-created_at'], name='order_created_idx'),
+            # OrderFilter status + date range, ordered by -created_at
+            models.Index(fields=['status', '-created_at'], name='order_status_created_idx'),
+            # orders of a customer (customer_email filter, reports per customer)
+            models.Index(fields=['customer', 'created_at'], name='order_customer_created_idx'),
+        ]
 
     def total(self):
         return sum(item.subtotal() for item in self.items.all())
 
+    def refresh_totals(self):
+        Order.objects.filter(pk=self.pk).refresh_totals()
+        self.refresh_from_db(fields=['total_amount', 'items_count'])
+
     def __str__(self):
         return f"Order {self.id} - {self.customer.full_name} - {self.status}"
 
@@ -30,6 +68,45 @@ class OrderItem(models.Model):
 
     def subtotal(self):
         return self.unit_price * self.quantity
+
+    @staticmethod
+    def subtotal_expression():
+        return ExpressionWrapper(F('unit_price') * F('quantity'),
+                                 output_field=DecimalField(max_digits=12, decimal_places=2))
     
     def __str__(self):
-        return f"{self.quantity} x {self.product.name}"
\ No newline at end of file
+        return f"{self.quantity} x {self.product.name}"
+
+
+class StockReservation(models.Model):
+    """
+    Stock held by an order. Creating a PENDING order takes the stock off
+    Product.stock and holds it until `expires_at`; paying commits the hold,
+    cancelling releases it and the sweeper (orders.tasks.expire_stock_holds)
+    gives back the stock of holds that expired. See orders.reservations.
+    """
+    ACTIVE = 'ACTIVE'
+    COMMITTED = 'COMMITTED'
+    RELEASED = 'RELEASED'
+    EXPIRED = 'EXPIRED'
+    STATUS_CHOICES = [
+        (ACTIVE, 'Active'),
+        (COMMITTED, 'Committed'),
+        (RELEASED, 'Released'),
+        (EXPIRED, 'Expired'),
+    ]
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ACTIVE)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # the sweeper looks for ACTIVE holds past expires_at
+            models.Index(fields=['status', 'expires_at'], name='reservation_status_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} for order {self.order_id} ({self.status})"
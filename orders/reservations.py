@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.versioning import bump_version
+from products.models import Product
+from products.stock import apply_stock_deltas, lock_products, take_stock
+from .models import StockReservation
+
+
+class HoldUnavailable(Exception):
+    """
+    Not enough stock to (re)take a hold. `product_ids` are the products that fell short.
+    """
+
+    def __init__(self, product_ids):
+        super().__init__(f"Insufficient stock for products {sorted(product_ids)}")
+        self.product_ids = product_ids
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=settings.STOCK_HOLD_TTL_MINUTES)
+
+
+def hold_stock(order, requested):
+    """
+    Take {product_id: quantity} off the stock for `order` and record the holds.
+
+    Each product is decremented with a conditional UPDATE (stock >= quantity), in
+    id order, so there is no SELECT ... FOR UPDATE and the product rows are only
+    locked from these updates to the end of the transaction: call it last. Raises
+    HoldUnavailable listing every product that fell short (the caller's
+    transaction must be rolled back).
+    """
+    short = [pid for pid in sorted(requested) if not take_stock(pid, requested[pid])]
+    if short:
+        raise HoldUnavailable(short)
+
+    expires_at = hold_expiry()
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, product_id=pid, quantity=quantity, expires_at=expires_at)
+        for pid, quantity in requested.items()
+    ])
+    bump_version(Product)
+
+
+def commit_holds(order):
+    """
+    Make the holds of `order` permanent (on pay). Holds the sweeper already
+    expired gave their stock back, so it is taken again; raises HoldUnavailable if
+    it's gone. Must run inside a transaction.
+    """
+    holds = list(StockReservation.objects.select_for_update().filter(order=order).order_by('id'))
+    expired = {}
+    for hold in holds:
+        if hold.status == StockReservation.EXPIRED:
+            expired[hold.product_id] = expired.get(hold.product_id, 0) + hold.quantity
+
+    short = [pid for pid in sorted(expired) if not take_stock(pid, expired[pid])]
+    if short:
+        raise HoldUnavailable(short)
+    if expired:
+        bump_version(Product)
+
+    StockReservation.objects.filter(
+        id__in=[h.id for h in holds if h.status in (StockReservation.ACTIVE, StockReservation.EXPIRED)]
+    ).update(status=StockReservation.COMMITTED)
+
+
+def expire_holds(batch_size=None, now=None):
+    """
+    Give back the stock of ACTIVE holds past their expiry, `batch_size` holds per
+    transaction. Rows being paid or cancelled right now are skipped (SKIP LOCKED)
+    and picked up by the next run. Returns the number of expired holds.
+    """
+    batch_size = batch_size or settings.STOCK_HOLD_SWEEP_BATCH_SIZE
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            holds = list(StockReservation.objects.select_for_update(skip_locked=True)
+                         .filter(status=StockReservation.ACTIVE, expires_at__lte=now)
+                         .order_by('id')[:batch_size])
+            if not holds:
+                return expired
+
+            restock = {}
+            for hold in holds:
+                restock[hold.product_id] = restock.get(hold.product_id, 0) + hold.quantity
+            lock_products(restock.keys())
+            apply_stock_deltas(restock)
+            StockReservation.objects.filter(id__in=[h.id for h in holds]).update(status=StockReservation.EXPIRED)
+        expired += len(holds)
+        if len(holds) < batch_size:
+            return expired
@@ -1,7 +1,13 @@
 from rest_framework import serializers
 from .models import Order, OrderItem
 from products.models import Product
+from core.versioning import bump_version
+from django.conf import settings
 from django.db import transaction
+from django.utils.functional import cached_property
+from events.models import OutboxEvent
+from events.outbox import order_event, record_events
+from .reservations import HoldUnavailable, hold_stock
 
 class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -23,52 +29,133 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'customer', 'status', 'created_at', 'items', 'total_amount']
     
     def get_total_amount(self, obj):
-        return obj.total()
+        return obj.total_amount
+
+    @cached_property
+    def _fast_accessors(self):
+        # bound field converters, so dates and decimals render exactly as the DRF fields do
+        return (self.fields['created_at'].to_representation,
+                self.fields['items'].child.fields['unit_price'].to_representation)
+
+    def to_representation(self, instance):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().to_representation(instance)
+
+        # same output as the declared fields, without the per-field/per-item machinery
+        created_at, unit_price = self._fast_accessors
+        return {
+            'id': instance.id,
+            'customer': instance.customer_id,
+            'status': instance.status,
+            'created_at': None if instance.created_at is None else created_at(instance.created_at),
+            'items': [
+                {
+                    'id': item.id,
+                    'product': item.product_id,
+                    'product_name': item.product.name,
+                    'quantity': item.quantity,
+                    'unit_price': unit_price(item.unit_price),
+                    'subtotal': item.subtotal(),
+                }
+                for item in instance.items.all()
+            ],
+            'total_amount': instance.total_amount,
+        }
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')
 
+        # recolect (product id, quantity) lines
+        lines = []
+        for item_data in items_data:
+            prod = item_data['product']
+            pid = int(prod) if isinstance(prod, (int, str)) else prod.pk
+            lines.append((pid, item_data['quantity']))
+
+        # requested quantity per product (the same product may appear on several lines)
+        requested = {}
+        for pid, quantity in lines:
+            requested[pid] = requested.get(pid, 0) + quantity
+
+        # validate every line before writing anything (plain read, the hold below re-checks the stock)
+        products_map = Product.objects.in_bulk(requested.keys())
+        errors = []
+        for pid, quantity in requested.items():
+            product = products_map.get(pid)
+            if product is None:
+                errors.append(f"Product {pid} not found")
+            elif product.total_stock < quantity:
+                errors.append(f"Insufficient stock for product {product.name}")
+        if errors:
+            raise serializers.ValidationError(errors)
+
         # guaranteed atomic transaction
         with transaction.atomic():
-            order = Order.objects.create(**validated_data)
-        
-            # recolect product IDs or instances
-            product_ids = []
-            for it in items_data:
-                prod = it['product']
-                pid = int(prod) if isinstance(prod, (int, str)) else prod.pk
-                product_ids.append(pid)
-
-            # lock products in one query
-            products_map = {
-                p.id: p
-                for p in Product.objects.select_for_update().filter(id__in=product_ids)
-            }
-
-            for item_data in items_data:
-                product = item_data['product']
-                quantity = item_data['quantity']
-
-                pid = int(prod) if isinstance(prod, (int, str)) else prod.pk
-
-                product = products_map.get(pid)
-                if product is None:
-                    raise serializers.ValidationError(f"Product {pid} not found")
-
-                # validate stock availability
-                if product.stock < quantity:
-                    raise serializers.ValidationError(f"Insufficient stock for product {product.name}")
-
-                # freeze the unit price at the time of order creation
-                unit_price = product.price
-            
-                # reduce stock
-                product.stock -= quantity
-                product.save(update_fields=['stock'])
-
-                OrderItem.objects.create(order=order, 
-                                        product=product, 
-                                        quantity=quantity, 
-                                        unit_price=unit_price)
-
-        return order
\ No newline at end of file
+            order = Order.objects.create(
+                **validated_data,
+                total_amount=sum(products_map[pid].price * quantity for pid, quantity in lines),
+                items_count=len(lines),
+            )
+
+            # freeze the unit price at the time of order creation
+            items = OrderItem.objects.bulk_create([
+                OrderItem(order=order,
+                          product=products_map[pid],
+                          quantity=quantity,
+                          unit_price=products_map[pid].price)
+                for pid, quantity in lines
+            ])
+            bump_version(OrderItem)
+            record_events([order_event(OutboxEvent.ORDER_CREATED, order, items)])
+
+            # hold the stock last, so the product rows are locked as briefly as possible
+            try:
+                hold_stock(order, requested)
+            except HoldUnavailable as exc:
+                raise serializers.ValidationError(
+                    [f"Insufficient stock for product {products_map[pid].name}" for pid in exc.product_ids])
+
+        return order
+
+
+class BulkCancelSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+
+
+class BulkCancelResultSerializer(serializers.Serializer):
+    cancelled = serializers.ListField(child=serializers.IntegerField())
+    already_cancelled = serializers.ListField(child=serializers.IntegerField())
+    not_found = serializers.ListField(child=serializers.IntegerField())
+
+
+class BulkOrderItemInputSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class BulkOrderInputSerializer(serializers.Serializer):
+    # ids are checked in bulk by orders.services.ingest_orders, not one query per field
+    customer = serializers.IntegerField(min_value=1)
+    items = BulkOrderItemInputSerializer(many=True, allow_empty=False)
+
+
+class BulkOrderIngestSerializer(serializers.Serializer):
+    orders = serializers.ListField(child=serializers.JSONField(), allow_empty=False)
+
+    def validate_orders(self, value):
+        if len(value) > settings.ORDERS_BULK_MAX_ORDERS:
+            raise serializers.ValidationError(f"At most {settings.ORDERS_BULK_MAX_ORDERS} orders per request.")
+        return value
+
+
+class BulkOrderResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = serializers.ListField(child=serializers.DictField())
+
+
+class BulkOrderJobSerializer(serializers.Serializer):
+    job_id = serializers.CharField()
+    status = serializers.CharField()
+    result = BulkOrderResultSerializer(required=False)
+    error = serializers.CharField(required=False)
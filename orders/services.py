@@ -0,0 +1,163 @@
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.versioning import bump_version
+from customers.models import Customer
+from events.models import OutboxEvent
+from events.outbox import order_event, record_events
+from products.stock import apply_stock_deltas, lock_products
+from .models import Order, OrderItem, StockReservation
+from .reservations import hold_expiry
+from .serializers import BulkOrderInputSerializer
+
+CANCELLABLE_STATUSES = ('PENDING', 'PAID')
+
+
+def cancel_orders(order_ids):
+    """
+    Cancel the given orders in one transaction and put their items back in stock.
+    Their stock holds are released; the quantity of holds that had already expired
+    is not restocked again.
+
+    Orders and then products are locked in id order, so concurrent cancels and
+    order creations always take row locks in the same order and can't deadlock.
+    The restock is aggregated per product and applied with a single UPDATE.
+    Returns {'cancelled': [...], 'already_cancelled': [...], 'not_found': [...]}.
+    """
+    order_ids = set(order_ids)
+    with transaction.atomic():
+        orders = list(Order.objects.select_for_update().filter(id__in=order_ids).order_by('id')
+                      .only('id', 'status', 'customer_id', 'total_amount', 'items_count'))
+        cancelled = [o.id for o in orders if o.status in CANCELLABLE_STATUSES]
+
+        restock = {
+            row['product_id']: row['quantity']
+            for row in OrderItem.objects.filter(order_id__in=cancelled).order_by()
+            .values('product_id').annotate(quantity=Sum('quantity'))
+        }
+        # stock of expired holds was already given back by the sweeper
+        holds = list(StockReservation.objects.select_for_update().filter(order_id__in=cancelled).order_by('id')
+                     .values_list('id', 'product_id', 'quantity', 'status'))
+        for _, product_id, quantity, hold_status in holds:
+            if hold_status == StockReservation.EXPIRED:
+                restock[product_id] -= quantity
+        restock = {product_id: quantity for product_id, quantity in restock.items() if quantity}
+        StockReservation.objects.filter(
+            id__in=[hold_id for hold_id, _, _, hold_status in holds if hold_status != StockReservation.EXPIRED]
+        ).update(status=StockReservation.RELEASED)
+        lock_products(restock.keys())
+        apply_stock_deltas(restock)
+
+        if cancelled:
+            Order.objects.filter(id__in=cancelled).update(status='CANCELLED', updated_at=timezone.now())
+            bump_version(Order)
+            events = []
+            for order in orders:
+                if order.status in CANCELLABLE_STATUSES:
+                    order.status = 'CANCELLED'
+                    events.append(order_event(OutboxEvent.ORDER_CANCELLED, order))
+            record_events(events)
+
+    found = {o.id for o in orders}
+    return {
+        'cancelled': cancelled,
+        'already_cancelled': sorted(found - set(cancelled)),
+        'not_found': sorted(order_ids - found),
+    }
+
+
+def _requested(items):
+    requested = {}
+    for item in items:
+        requested[item['product']] = requested.get(item['product'], 0) + item['quantity']
+    return requested
+
+
+def ingest_orders(payloads):
+    """
+    Create many orders at once, each one succeeding or failing on its own.
+
+    Every payload is validated up front; customers are checked with one query and
+    every referenced product is locked once (in id order). Stock is then allocated
+    in memory in payload order, so an order that no longer fits fails without
+    aborting the rest. The accepted orders and their items are bulk inserted and
+    the stock of every product is reduced with a single UPDATE; the taken stock
+    is held for each order as a single create does (see orders.reservations).
+
+    Returns {'created': n, 'failed': n, 'results': [...]} with one result per
+    payload, in order: {'index', 'status': 'created', 'id'} or
+    {'index', 'status': 'failed', 'errors'}.
+    """
+    results = [None] * len(payloads)
+    valid = []
+    for index, payload in enumerate(payloads):
+        serializer = BulkOrderInputSerializer(data=payload)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': 'failed', 'errors': serializer.errors}
+
+    customer_ids = set(Customer.objects.filter(id__in={data['customer'] for _, data in valid})
+                       .values_list('id', flat=True))
+
+    with transaction.atomic():
+        products_map = lock_products({item['product'] for _, data in valid for item in data['items']})
+        available = {pid: product.total_stock for pid, product in products_map.items()}
+
+        accepted = []
+        for index, data in valid:
+            requested = _requested(data['items'])
+
+            errors = []
+            if data['customer'] not in customer_ids:
+                errors.append(f"Customer {data['customer']} not found")
+            for pid, quantity in requested.items():
+                if pid not in products_map:
+                    errors.append(f"Product {pid} not found")
+                elif available[pid] < quantity:
+                    errors.append(f"Insufficient stock for product {products_map[pid].name}")
+            if errors:
+                results[index] = {'index': index, 'status': 'failed', 'errors': errors}
+                continue
+
+            for pid, quantity in requested.items():
+                available[pid] -= quantity
+            accepted.append((index, data))
+
+        orders = Order.objects.bulk_create([
+            Order(customer_id=data['customer'],
+                  total_amount=sum(products_map[item['product']].price * item['quantity'] for item in data['items']),
+                  items_count=len(data['items']))
+            for _, data in accepted
+        ])
+
+        # freeze the unit price at the time of order creation
+        items = OrderItem.objects.bulk_create([
+            OrderItem(order=order,
+                      product=products_map[item['product']],
+                      quantity=item['quantity'],
+                      unit_price=products_map[item['product']].price)
+            for order, (_, data) in zip(orders, accepted)
+            for item in data['items']
+        ], batch_size=1000)
+
+        expires_at = hold_expiry()
+        StockReservation.objects.bulk_create([
+            StockReservation(order=order, product_id=pid, quantity=quantity, expires_at=expires_at)
+            for order, (_, data) in zip(orders, accepted)
+            for pid, quantity in _requested(data['items']).items()
+        ], batch_size=1000)
+
+        apply_stock_deltas({pid: available[pid] - product.total_stock for pid, product in products_map.items()})
+        if orders:
+            bump_version(Order, OrderItem)
+        items_by_order = {}
+        for item in items:
+            items_by_order.setdefault(item.order_id, []).append(item)
+        record_events([order_event(OutboxEvent.ORDER_CREATED, order, items_by_order.get(order.id, []))
+                       for order in orders])
+
+    for order, (index, _) in zip(orders, accepted):
+        results[index] = {'index': index, 'status': 'created', 'id': order.id}
+    return {'created': len(orders), 'failed': len(payloads) - len(orders), 'results': results}
@@ -1,43 +1,183 @@
 import csv
-from celery import shared_task
+import gzip
+import io
+import os
+import shutil
+from datetime import date, datetime, timedelta
+from celery import chord, shared_task
+from django.conf import settings
 from django.utils import timezone
-from .models import Order
+from django.utils.dateparse import parse_date, parse_datetime
+from .exports import CSV_HEADER, atomic_output, orders_in_window, write_orders_columnar, write_orders_csv
+from .reservations import expire_holds
+from .services import ingest_orders
 
 # @shared_task
 # def hello_celery():
 #     print("Hello, Celery!")
 
+
+def _as_datetime(value):
+    # celery arguments travel as json, so datetimes may arrive as ISO strings
+    if value is None or not isinstance(value, str):
+        return value
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid datetime: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _day_start(value):
+    # accepts a date, a datetime or their ISO strings and returns the aware midnight of that day
+    if isinstance(value, str):
+        value = parse_date(value) or _as_datetime(value)
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    if not isinstance(value, date):
+        raise ValueError(f"Invalid date: {value}")
+    return timezone.make_aware(datetime.combine(value, datetime.min.time()))
+
+
+def partition_range(since, until, partition_hours=24):
+    """
+    Split [since, until) into consecutive [start, end) windows of `partition_hours`.
+    """
+    step = timedelta(hours=partition_hours)
+    partitions = []
+    start = since
+    while start < until:
+        end = min(start + step, until)
+        partitions.append((start, end))
+        start = end
+    return partitions
+
+
 @shared_task
-def export_daily_orders_to_csv():
+def export_daily_orders_to_csv(since=None, until=None, output_path=None, chunk_size=None):
     """
-    Task to export all orders to a CSV file.
+    Task to export the orders created in [since, until) to a CSV file.
+    Defaults to the last 24 hours and to ORDERS_EXPORT_DIR/daily_sales_YYYYMMDD.csv.
     """
-    now = timezone.now()
-    since = now - timezone.timedelta(hours=24)
-    
-    orders = Order.objects.filter(created_at__gte=since, created_at__lte=now)
+    until = _as_datetime(until) or timezone.now()
+    since = _as_datetime(since) or until - timezone.timedelta(hours=24)
+
+    orders = orders_in_window(since, until)
 
     if not orders.exists():
-        return f"No orders found in the last 24 hours."
-    
-    filename = f"/tmp/daily_sales_{now.strftime('%Y%m%d')}.csv"
-
-    with open(filename, mode='w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(['Order ID', 'Customer Email', 'Items Count', 'Total Amount', 'Status', 'Created At'])
-
-        for order in orders:
-            items_count = order.items.count()
-            writer.writerow([
-                order.id,
-                order.customer.email,
-                items_count,
-                order.total(),
-                order.status,
-                order.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-
-    return f"CSV generated: {filename}"
-        
-
-    
\ No newline at end of file
+        return f"No orders found between {since.isoformat()} and {until.isoformat()}."
+
+    filename = output_path or os.path.join(settings.ORDERS_EXPORT_DIR, f"daily_sales_{until.strftime('%Y%m%d')}.csv")
+    count = write_orders_csv(filename, orders, chunk_size=chunk_size)
+
+    return f"CSV generated: {filename} ({count} orders)"
+
+
+@shared_task
+def export_daily_orders_columnar(since=None, until=None, output_dir=None, chunk_size=None):
+    """
+    Task to export the orders created in [since, until) and their items to two
+    columnar files (see orders.columnar), for analytics jobs.
+    """
+    until = _as_datetime(until) or timezone.now()
+    since = _as_datetime(since) or until - timezone.timedelta(hours=24)
+
+    output_dir = output_dir or settings.ORDERS_EXPORT_DIR
+    stamp = until.strftime('%Y%m%d')
+    orders_path = os.path.join(output_dir, f"daily_orders_{stamp}.scol")
+    items_path = os.path.join(output_dir, f"daily_order_items_{stamp}.scol")
+    orders_count, items_count = write_orders_columnar(orders_path, items_path, orders_in_window(since, until),
+                                                      chunk_size=chunk_size)
+
+    return f"Columnar export generated: {orders_path} ({orders_count} orders), {items_path} ({items_count} items)"
+
+
+@shared_task
+def export_orders_partition(since, until, shard_path, chunk_size=None):
+    """
+    Export one partition of a historical export as a headerless CSV shard.
+    A shard only exists once fully written, so existing shards are skipped.
+    """
+    if os.path.exists(shard_path):
+        return shard_path
+    write_orders_csv(shard_path, orders_in_window(_as_datetime(since), _as_datetime(until)),
+                     header=False, chunk_size=chunk_size)
+    return shard_path
+
+
+@shared_task
+def merge_order_shards(results, shard_paths, output_path, compress=False):
+    """
+    Chord callback: concatenate the shards in partition order under a single header
+    (optionally gzip compressed) and remove them.
+    """
+    header = io.StringIO()
+    csv.writer(header).writerow(CSV_HEADER)
+
+    with atomic_output(output_path, mode='wb') as raw:
+        out = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+        out.write(header.getvalue().encode())
+        for shard_path in shard_paths:
+            with open(shard_path, 'rb') as shard:
+                shutil.copyfileobj(shard, out)
+        if compress:
+            out.close()
+
+    if shard_paths:
+        shutil.rmtree(os.path.dirname(shard_paths[0]), ignore_errors=True)
+    return f"CSV generated: {output_path}"
+
+
+@shared_task
+def export_orders_range_to_csv(date_from, date_to, partition_hours=24, output_path=None, compress=False, chunk_size=None):
+    """
+    Export the orders created from `date_from` to `date_to` (both days included).
+    Each partition is exported by its own worker and the shards are merged by a chord
+    callback. Partitions already exported by a previous run are not exported again.
+    """
+    since = _day_start(date_from)
+    until = _day_start(date_to) + timedelta(days=1)
+    if since >= until:
+        raise ValueError("date_from must not be after date_to")
+
+    if output_path is None:
+        name = f"orders_{since.strftime('%Y%m%d')}_{(until - timedelta(days=1)).strftime('%Y%m%d')}.csv"
+        output_path = os.path.join(settings.ORDERS_EXPORT_DIR, name + ('.gz' if compress else ''))
+    shard_dir = f"{output_path}.parts"
+    os.makedirs(shard_dir, exist_ok=True)
+
+    shard_paths = []
+    pending = []
+    for start, end in partition_range(since, until, partition_hours):
+        shard_path = os.path.join(shard_dir, f"{start.strftime('%Y%m%dT%H%M%S')}.csv")
+        shard_paths.append(shard_path)
+        if not os.path.exists(shard_path):
+            pending.append(export_orders_partition.si(start.isoformat(), end.isoformat(), shard_path, chunk_size))
+
+    merge = merge_order_shards.s(shard_paths, output_path, compress)
+    if not pending:
+        merge.delay([])
+        return f"All {len(shard_paths)} partitions already exported, merging into {output_path}"
+
+    chord(pending)(merge)
+    return f"Exporting {len(pending)} of {len(shard_paths)} partitions into {output_path}"
+
+
+@shared_task
+def ingest_orders_task(payloads):
+    """
+    Task behind POST /api/orders/bulk/?async=true, see orders.services.ingest_orders.
+    The result (per-order outcome) is kept in the result backend.
+    """
+    return ingest_orders(payloads)
+
+
+@shared_task
+def expire_stock_holds():
+    """
+    Give back the stock of PENDING orders whose hold expired (every minute, see
+    core.signals). The orders stay PENDING; paying one takes the stock again.
+    """
+    expired = expire_holds()
+    return f"Expired {expired} stock holds"
@@ -5,7 +5,25 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from products.models import Product
 from customers.models import Customer
-from orders.models import Order
+from orders.models import Order, OrderItem, StockReservation
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from io import StringIO
+import csv
+import os
+import tempfile
+
+import gzip
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from sales_api.celery import app as celery_app
+from decimal import Decimal
+from orders.columnar import read_columnar
+from orders.tasks import (expire_stock_holds, export_daily_orders_columnar, export_daily_orders_to_csv,
+                          export_orders_partition, export_orders_range_to_csv)
 
 
 # ==== Helpers para manejar respuestas con/ sin paginación ====
@@ -124,6 +142,351 @@ class OrderFlowTests(BaseAPITestCase):
         self.prod.refresh_from_db()
         self.assertEqual(self.prod.stock, start_stock)
 
+    def test_create_with_repeated_product_and_oversold_lines(self):
+        """
+        Las líneas del mismo producto se descuentan juntas; si alguna línea excede
+        el stock se rechaza la orden completa con un error por producto.
+        """
+        client = self.auth_client(self.tok_manager)
+
+        resp = client.post(
+            reverse("order-list"),
+            {"customer": self.cust.id, "items": [
+                {"product": self.prod.id, "quantity": 2},
+                {"product": self.prod2.id, "quantity": 1},
+                {"product": self.prod.id, "quantity": 3},
+            ]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual([i["product"] for i in resp.data["items"]], [self.prod.id, self.prod2.id, self.prod.id])
+        self.prod.refresh_from_db()
+        self.prod2.refresh_from_db()
+        self.assertEqual(self.prod.stock, 5)
+        self.assertEqual(self.prod2.stock, 4)
+
+        resp = client.post(
+            reverse("order-list"),
+            {"customer": self.cust.id, "items": [
+                {"product": self.prod.id, "quantity": 4},
+                {"product": self.prod.id, "quantity": 2},
+                {"product": self.prod2.id, "quantity": 5},
+            ]},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400, resp.data)
+        self.assertEqual(len(resp.data), 2)
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 5)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_bulk_cancel_restocks_with_a_single_update(self):
+        """
+        bulk-cancel cancela varias órdenes en una transacción y repone el stock
+        agregado por producto con un único UPDATE.
+        """
+        client = self.auth_client(self.tok_manager)
+        ids = []
+        for items in ([{"product": self.prod.id, "quantity": 2}, {"product": self.prod.id, "quantity": 1}],
+                      [{"product": self.prod.id, "quantity": 1}, {"product": self.prod2.id, "quantity": 2}]):
+            resp = client.post(reverse("order-list"), {"customer": self.cust.id, "items": items}, format="json")
+            self.assertEqual(resp.status_code, 201, resp.data)
+            ids.append(resp.data["id"])
+        client.post(reverse("order-cancel", args=[ids[1]]))
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 7)
+
+        resp = client.post(reverse("order-list"), {"customer": self.cust.id,
+                                                   "items": [{"product": self.prod2.id, "quantity": 1}]}, format="json")
+        ids.append(resp.data["id"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.post(reverse("order-bulk-cancel"), {"ids": ids + [999999]}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data, {"cancelled": [ids[0], ids[2]], "already_cancelled": [ids[1]],
+                                     "not_found": [999999]})
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "products_product"')]
+        self.assertEqual(len(updates), 1)
+
+        self.prod.refresh_from_db()
+        self.prod2.refresh_from_db()
+        self.assertEqual((self.prod.stock, self.prod2.stock), (10, 5))
+        self.assertEqual(set(Order.objects.values_list("status", flat=True)), {"CANCELLED"})
+
+    def test_bulk_ingest_partial_success(self):
+        """
+        POST /orders/bulk/ crea las órdenes válidas y reporta las fallidas por índice,
+        bloqueando los productos una sola vez y sin abortar el lote.
+        """
+        client = self.auth_client(self.tok_manager)
+        orders = [
+            {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 6},
+                                                 {"product": self.prod2.id, "quantity": 1}]},
+            {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 5}]},  # ya no alcanza
+            {"customer": 999999, "items": [{"product": self.prod.id, "quantity": 1}]},
+            {"customer": self.cust.id, "items": []},
+            {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 4}]},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.post(reverse("order-bulk"), {"orders": orders}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual((resp.data["created"], resp.data["failed"]), (2, 3))
+        self.assertEqual([r["status"] for r in resp.data["results"]],
+                         ["created", "failed", "failed", "failed", "created"])
+        self.assertIn("Insufficient stock", resp.data["results"][1]["errors"][0])
+        self.assertIn("items", resp.data["results"][3]["errors"])
+
+        locks = [q for q in ctx.captured_queries if q["sql"].startswith('SELECT') and '"products_product"' in q["sql"]]
+        self.assertEqual(len(locks), 1)
+
+        first = Order.objects.get(id=resp.data["results"][0]["id"])
+        self.assertEqual((first.total_amount, first.items_count), (Decimal("650.00"), 2))
+        self.prod.refresh_from_db()
+        self.prod2.refresh_from_db()
+        self.assertEqual((self.prod.stock, self.prod2.stock), (0, 4))
+        self.assertEqual(OrderItem.objects.count(), 3)
+
+    def test_bulk_ingest_async_returns_job_id(self):
+        """
+        Con ?async=true el lote se procesa en una tarea de Celery y se devuelve el id del job.
+        """
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", False)
+        client = self.auth_client(self.tok_manager)
+        orders = [{"customer": self.cust.id, "items": [{"product": self.prod2.id, "quantity": 2}]}]
+        resp = client.post(reverse("order-bulk") + "?async=true", {"orders": orders}, format="json")
+        self.assertEqual(resp.status_code, 202, resp.data)
+        self.assertTrue(resp.data["job_id"])
+        self.prod2.refresh_from_db()
+        self.assertEqual(self.prod2.stock, 3)
+
+        job = mock.Mock(status="SUCCESS", result={"created": 1, "failed": 0, "results": []})
+        with mock.patch("orders.views.AsyncResult", return_value=job):
+            resp = client.get(reverse("order-bulk-status", args=[resp.data["job_id"]]))
+            self.assertEqual(resp.data["result"]["created"], 1)
+
+            # solo quien envió el lote ve sus resultados; un Viewer no consulta jobs
+            url = reverse("order-bulk-status", args=[resp.data["job_id"]])
+            self.assertEqual(self.auth_client(self.tok_seller).get(url).status_code, 404)
+            self.assertEqual(self.auth_client(self.tok_viewer).get(url).status_code, 403)
+
+
+class FastReadSerializerTests(BaseAPITestCase):
+    def test_fast_path_output_is_byte_identical(self):
+        """
+        Con FAST_READ_SERIALIZERS la respuesta de orders y products (incluida la de
+        Viewers, sin stock) es idéntica byte a byte a la de los serializers DRF.
+        """
+        client = self.auth_client(self.tok_manager)
+        for items in ([{"product": self.prod.id, "quantity": 2}, {"product": self.prod2.id, "quantity": 3}],
+                      [{"product": self.prod2.id, "quantity": 1}]):
+            client.post(reverse("order-list"), {"customer": self.cust.id, "items": items}, format="json")
+        self.prod.labels.create(name="Promo")
+
+        requests = [(self.tok_manager, reverse("order-list")),
+                    (self.tok_manager, reverse("order-detail", args=[Order.objects.first().id])),
+                    (self.tok_manager, reverse("product-list")),
+                    (self.tok_viewer, reverse("product-list"))]
+        for token, url in requests:
+            bodies = []
+            for fast in (False, True):
+                with override_settings(FAST_READ_SERIALIZERS=fast, RESPONSE_CACHE_TIMEOUT=0):
+                    resp = self.auth_client(token).get(url)
+                self.assertEqual(resp.status_code, 200)
+                bodies.append(resp.content)
+            self.assertEqual(bodies[0], bodies[1], url)
+
+
+class OrderTotalsTests(BaseAPITestCase):
+    def test_stored_totals_filter_ordering_and_backfill(self):
+        """
+        total_amount/items_count se guardan al crear; se puede filtrar y ordenar por total
+        y el comando de backfill recalcula órdenes existentes.
+        """
+        client = self.auth_client(self.tok_manager)
+        small = client.post(reverse("order-list"),
+                            {"customer": self.cust.id, "items": [{"product": self.prod2.id, "quantity": 1}]},
+                            format="json")
+        big = client.post(reverse("order-list"),
+                          {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 2},
+                                                               {"product": self.prod2.id, "quantity": 1}]},
+                          format="json")
+        self.assertEqual(big.status_code, 201, big.data)
+
+        order = Order.objects.get(id=big.data["id"])
+        self.assertEqual(order.total_amount, order.total())
+        self.assertEqual(order.total_amount, 250)
+        self.assertEqual(order.items_count, 2)
+
+        resp = client.get(reverse("order-list"), {"min_total": 100, "ordering": "-total_amount"})
+        self.assertEqual([o["id"] for o in get_results(resp.data)], [big.data["id"]])
+        resp = client.get(reverse("order-list"), {"ordering": "total_amount"})
+        self.assertEqual([o["id"] for o in get_results(resp.data)], [small.data["id"], big.data["id"]])
+
+        # filas sin totales (previas a la migración) se completan con el comando
+        legacy = Order.objects.create(customer=self.cust)
+        OrderItem.objects.create(order=legacy, product=self.prod, quantity=3, unit_price=10)
+        call_command("backfill_order_totals", batch_size=1, stdout=StringIO())
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.total_amount, legacy.items_count), (30, 1))
+
+
+class StockReservationTests(BaseAPITestCase):
+    def create_order(self, client, quantity):
+        resp = client.post(reverse("order-list"),
+                           {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": quantity}]},
+                           format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        return resp.data["id"]
+
+    def expire(self, order_id):
+        StockReservation.objects.filter(order_id=order_id).update(expires_at=datetime(2000, 1, 1, tzinfo=dt_timezone.utc))
+        expire_stock_holds()
+
+    def test_hold_expires_and_pay_takes_stock_again(self):
+        """
+        Crear retiene stock (hold ACTIVE); el barrido lo devuelve al vencer y pagar
+        lo vuelve a tomar, o responde 409 si ya no hay stock.
+        """
+        client = self.auth_client(self.tok_manager)
+        order_id = self.create_order(client, 4)
+        hold = StockReservation.objects.get(order_id=order_id)
+        self.assertEqual((hold.status, hold.quantity), (StockReservation.ACTIVE, 4))
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 6)
+
+        self.expire(order_id)
+        hold.refresh_from_db()
+        self.prod.refresh_from_db()
+        self.assertEqual((hold.status, self.prod.stock), (StockReservation.EXPIRED, 10))
+        self.assertEqual(Order.objects.get(id=order_id).status, "PENDING")
+
+        resp = client.post(reverse("order-pay", args=[order_id]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        hold.refresh_from_db()
+        self.prod.refresh_from_db()
+        self.assertEqual((hold.status, self.prod.stock), (StockReservation.COMMITTED, 6))
+
+        # otro pedido vencido cuyo stock ya se vendió no se puede pagar
+        late = self.create_order(client, 5)
+        self.expire(late)
+        self.create_order(client, 6)
+        resp = client.post(reverse("order-pay", args=[late]))
+        self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.get(id=late).status, "PENDING")
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 0)
+
+    def test_cancel_does_not_restock_expired_holds_twice(self):
+        """
+        Cancelar libera los holds activos y no repone de nuevo el stock de los vencidos.
+        """
+        client = self.auth_client(self.tok_manager)
+        expired = self.create_order(client, 3)
+        active = self.create_order(client, 2)
+        self.expire(expired)
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 8)
+
+        result = client.post(reverse("order-bulk-cancel"), {"ids": [expired, active]}, format="json")
+        self.assertEqual(result.data["cancelled"], [expired, active])
+        self.prod.refresh_from_db()
+        self.assertEqual(self.prod.stock, 10)
+        self.assertEqual(StockReservation.objects.get(order_id=active).status, StockReservation.RELEASED)
+        self.assertEqual(StockReservation.objects.get(order_id=expired).status, StockReservation.EXPIRED)
+
+
+class DailyExportTests(BaseAPITestCase):
+    def test_csv_export_uses_constant_queries(self):
+        """
+        El export diario escribe una fila por orden con email, cantidad de ítems y total,
+        sin consultas adicionales por orden.
+        """
+        for qty in (1, 2, 3):
+            order = Order.objects.create(customer=self.cust)
+            OrderItem.objects.create(order=order, product=self.prod, quantity=qty, unit_price=100)
+            OrderItem.objects.create(order=order, product=self.prod2, quantity=1, unit_price=50)
+            order.refresh_totals()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sales.csv")
+            # exists() + la consulta del export
+            with self.assertNumQueries(2):
+                result = export_daily_orders_to_csv(output_path=path, chunk_size=2)
+            self.assertIn(path, result)
+            with open(path, newline="") as fh:
+                rows = list(csv.reader(fh))
+            self.assertEqual(os.listdir(tmp), ["sales.csv"])
+
+        self.assertEqual(rows[0], ["Order ID", "Customer Email", "Items Count", "Total Amount", "Status", "Created At"])
+        self.assertEqual([r[1:5] for r in rows[1:]], [
+            ["alice@example.com", "2", "150.00", "PENDING"],
+            ["alice@example.com", "2", "250.00", "PENDING"],
+            ["alice@example.com", "2", "350.00", "PENDING"],
+        ])
+
+        # ventana sin órdenes: no se genera archivo
+        self.assertIn("No orders found", export_daily_orders_to_csv(until="2000-01-02T00:00:00Z"))
+
+    def test_range_export_merges_partitions_and_skips_done_ones(self):
+        """
+        El export histórico exporta cada partición por separado y las une en un único
+        CSV (gzip); al re-ejecutarlo no vuelve a exportar particiones ya terminadas.
+        """
+        for day in (1, 2, 4):
+            order = Order.objects.create(customer=self.cust)
+            Order.objects.filter(id=order.id).update(created_at=datetime(2025, 9, day, 12, tzinfo=dt_timezone.utc))
+
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", False)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.csv.gz")
+            # una partición ya exportada por una ejecución anterior
+            os.makedirs(path + ".parts")
+            with open(os.path.join(path + ".parts", "20250901T000000.csv"), "w") as fh:
+                fh.write("previous-run\r\n")
+
+            with mock.patch("orders.tasks.export_orders_partition.run", wraps=export_orders_partition.run) as run:
+                export_orders_range_to_csv("2025-09-01", "2025-09-04", output_path=path, compress=True)
+            self.assertEqual(run.call_count, 3)
+
+            with gzip.open(path, "rt", newline="") as fh:
+                rows = list(csv.reader(fh))
+            self.assertFalse(os.path.exists(path + ".parts"))
+
+        self.assertEqual(rows[0][0], "Order ID")
+        self.assertEqual(rows[1], ["previous-run"])
+        self.assertEqual([r[5][:10] for r in rows[2:]], ["2025-09-02", "2025-09-04"])
+
+    def test_columnar_export_round_trip(self):
+        """
+        El export columnar guarda órdenes e ítems tipados (decimal, timestamp, enum)
+        en bloques y se puede leer sin parsear texto.
+        """
+        orders = []
+        for qty, st in ((1, "PENDING"), (2, "PAID"), (3, "CANCELLED")):
+            order = Order.objects.create(customer=self.cust, status=st)
+            OrderItem.objects.create(order=order, product=self.prod, quantity=qty, unit_price=Decimal("10.25"))
+            order.refresh_totals()
+            orders.append(order)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            export_daily_orders_columnar(output_dir=tmp, chunk_size=2)
+            names = sorted(os.listdir(tmp))
+            schema, cols = read_columnar(os.path.join(tmp, names[1]))
+            item_schema, item_cols = read_columnar(os.path.join(tmp, names[0]))
+
+        self.assertEqual(schema["table"], "orders")
+        self.assertEqual(cols["id"], [o.id for o in orders])
+        self.assertEqual(cols["customer_email"], ["alice@example.com"] * 3)
+        self.assertEqual(cols["total_amount"], [Decimal("10.25"), Decimal("20.50"), Decimal("30.75")])
+        self.assertEqual(cols["status"], ["PENDING", "PAID", "CANCELLED"])
+        self.assertEqual(cols["created_at"], [Order.objects.get(id=o.id).created_at for o in orders])
+        self.assertEqual(item_schema["table"], "order_items")
+        self.assertEqual(item_cols["quantity"], [1, 2, 3])
+        self.assertEqual(item_cols["order_id"], [o.id for o in orders])
+
 
 class PermissionsTests(BaseAPITestCase):
     def test_seller_cannot_create_products(self):
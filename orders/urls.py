@@ -1,7 +1,12 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import OrderViewSet
+from .views import AsyncOrderView, OrderViewSet
 
 router = DefaultRouter()
 router.register(r'orders', OrderViewSet, basename='order')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls + [
+    # async read-only endpoints (core.async_views), for ASGI deployments
+    path('async/orders/', AsyncOrderView.as_view(), name='order-async-list'),
+    path('async/orders/<int:pk>/', AsyncOrderView.as_view(), name='order-async-detail'),
+]
@@ -1,27 +1,58 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from celery.result import AsyncResult
 
-from .models import Order
-from .serializers import OrderSerializer
+from core.async_views import AsyncReadOnlyView
+from core.cache import ConditionalGetMixin
+from core.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from core.roles import user_has_perms
+from core.streaming import StreamingListMixin
+from events.models import OutboxEvent
+from events.outbox import order_event, record_events
+from products.models import Product
+from .models import Order, OrderItem
+from .serializers import (
+    BulkCancelResultSerializer, BulkCancelSerializer, BulkOrderIngestSerializer, BulkOrderJobSerializer,
+    BulkOrderResultSerializer, OrderSerializer,
+)
+from .reservations import HoldUnavailable, commit_holds
+from .services import cancel_orders, ingest_orders
+from .tasks import ingest_orders_task
 from .filters import OrderFilter
 
 
+def bulk_job_key(job_id):
+    return f"orders-bulk-job:{job_id}"
+
+
 # Create your views here.
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(StreamingListMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all().select_related("customer").prefetch_related("items__product")
+    cache_dependencies = (Order, OrderItem, Product)
     serializer_class = OrderSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = OrderFilter
+    ordering_fields = ['id', 'customer', 'status', 'created_at', 'total_amount', 'items_count']
     ordering = ['-created_at']
 
+    # POST /orders/ -> create an order (repeats with the same Idempotency-Key get the first response)
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     # POST /orders/{id}/pay/ -> to pay for an order
-    @extend_schema(request=None, responses=OrderSerializer)
+    @extend_schema(request=None, responses=OrderSerializer, parameters=[IDEMPOTENCY_KEY_PARAMETER])
     @action(detail=True, methods=['post'])
+    @idempotent
     def pay(self, request, pk=None):
         order = self.get_object()
         if order.status == 'PAID':
@@ -29,15 +60,26 @@ class OrderViewSet(viewsets.ModelViewSet):
         if order.status != 'PENDING':
             return Response({'error': 'Order cannot be paid'}, status=status.HTTP_409_CONFLICT)
         
-        with transaction.atomic():
-            order.status = 'PAID'
-            order.save(update_fields=['status'])
+        try:
+            with transaction.atomic():
+                # a concurrent pay/cancel may have got here first
+                if Order.objects.select_for_update().values_list('status', flat=True).get(pk=order.pk) != 'PENDING':
+                    return Response({'error': 'Order cannot be paid'}, status=status.HTTP_409_CONFLICT)
+                # holds that already expired are taken again, if the stock is still there
+                commit_holds(order)
+                order.status = 'PAID'
+                order.save(update_fields=['status', 'updated_at'])
+                record_events([order_event(OutboxEvent.ORDER_PAID, order)])
+        except HoldUnavailable:
+            return Response({'error': 'Stock hold expired and the stock is no longer available'},
+                            status=status.HTTP_409_CONFLICT)
 
         return Response(OrderSerializer(order, context={'request': request}).data, status=status.HTTP_200_OK)
     
     # POST /orders/{id}/cancel/ -> to cancel an order
-    @extend_schema(request=None, responses=OrderSerializer)
+    @extend_schema(request=None, responses=OrderSerializer, parameters=[IDEMPOTENCY_KEY_PARAMETER])
     @action(detail=True, methods=['post'])
+    @idempotent
     def cancel(self, request, pk=None):
         order = self.get_object()
         if order.status == 'CANCELLED':
@@ -45,13 +87,64 @@ class OrderViewSet(viewsets.ModelViewSet):
         if order.status not in ['PENDING', 'PAID']:
             return Response({'error': 'Order cannot be canceled'}, status=status.HTTP_409_CONFLICT)
         
-        with transaction.atomic():
-            items = order.items.select_related('product').select_for_update()
-            # restock items
-            for item in items:
-                item.product.stock += item.quantity
-                item.product.save(update_fields=['stock'])
-            
-            order.status = 'CANCELLED'
-            order.save(update_fields=['status'])
+        # restock items with a single aggregated UPDATE
+        cancel_orders([order.pk])
+        order.refresh_from_db(fields=['status'])
         return Response(OrderSerializer(order, context={'request': request}).data, status=status.HTTP_200_OK)
+
+    # POST /orders/bulk-cancel/ -> to cancel many orders in one transaction
+    @extend_schema(request=BulkCancelSerializer, responses=BulkCancelResultSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-cancel')
+    def bulk_cancel(self, request):
+        serializer = BulkCancelSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = cancel_orders(serializer.validated_data['ids'])
+        return Response(BulkCancelResultSerializer(result).data, status=status.HTTP_200_OK)
+
+    # POST /orders/bulk/ -> to create many orders, each one succeeds or fails on its own
+    @extend_schema(
+        request=BulkOrderIngestSerializer,
+        responses={200: BulkOrderResultSerializer, 202: BulkOrderJobSerializer},
+        parameters=[OpenApiParameter('async', bool, description='Process the batch in a Celery task and return a job id')],
+    )
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        serializer = BulkOrderIngestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payloads = serializer.validated_data['orders']
+
+        if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+            if not settings.SHARED_CACHE:
+                raise ValidationError({'async': ['Async ingestion needs a shared cache (CACHE_URL).']})
+            job = ingest_orders_task.delay(payloads)
+            # only the submitter may read the per-order results, for as long as the backend keeps them
+            cache.set(bulk_job_key(job.id), request.user.pk, ingest_orders_task.app.conf.result_expires.total_seconds())
+            return Response({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+        return Response(ingest_orders(payloads), status=status.HTTP_200_OK)
+
+    # GET /orders/bulk/{job_id}/ -> to check an async bulk ingestion
+    @extend_schema(request=None, responses=BulkOrderJobSerializer)
+    @action(detail=False, methods=['get'], url_path=r'bulk/(?P<job_id>[0-9a-f-]+)')
+    def bulk_status(self, request, job_id=None):
+        if not user_has_perms(request, ['orders.add_order']):
+            raise PermissionDenied()
+        if not request.user.is_superuser and cache.get(bulk_job_key(job_id)) != request.user.pk:
+            raise NotFound()
+        job = AsyncResult(job_id)
+        data = {'job_id': job_id, 'status': job.status}
+        if job.successful():
+            data['result'] = job.result
+        elif job.failed():
+            data['error'] = str(job.result)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class AsyncOrderView(AsyncReadOnlyView):
+    queryset = Order.objects.all()
+    serializer_class = OrderSerializer
+    filterset_class = OrderFilter
+    filter_backends = (OrderingFilter,)
+    ordering_fields = OrderViewSet.ordering_fields
+    prefetch = ('items__product',)
+    ordering = ('-created_at',)
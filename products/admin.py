@@ -4,7 +4,7 @@ from .models import Product, Label
 # Register your models here.
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'sku', 'price', 'stock')
+    list_display = ('name', 'sku', 'price', 'total_stock', 'stock_shards')
     search_fields = ('name', 'sku')
     list_filter = ('labels',)
 
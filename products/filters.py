@@ -1,11 +1,34 @@
 import django_filters
+from rest_framework.filters import OrderingFilter
+
 from .models import Product
+from .search import search_products
 
 class ProductFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(field_name="price", lookup_expr='gte')
     max_price = django_filters.NumberFilter(field_name="price", lookup_expr='lte')
     tag = django_filters.CharFilter(field_name="sku", lookup_expr='iexact')
+    search = django_filters.CharFilter(method='filter_search', label='Search name, sku and labels')
 
     class Meta:
         model = Product
-        fields = ['min_price', 'max_price', 'tag']
\ No newline at end of file
+        fields = ['min_price', 'max_price', 'tag', 'search']
+
+    def filter_search(self, queryset, name, value):
+        return search_products(queryset, value)
+
+
+class ProductOrderingFilter(OrderingFilter):
+    """
+    ?ordering= for products. `stock` sorts by the stock the API shows, which for
+    sharded products is in the shards: it maps to the `available_stock`
+    annotation of products.stock.with_shard_stock.
+    """
+    aliases = {'stock': 'available_stock'}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [('-' if term.startswith('-') else '') + self.aliases.get(term.lstrip('-'), term.lstrip('-'))
+                for term in ordering]
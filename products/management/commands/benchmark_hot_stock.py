@@ -0,0 +1,109 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from customers.models import Customer
+from events.models import OutboxEvent, OutboxSequence
+from orders.models import Order, StockReservation
+from orders.serializers import OrderSerializer
+from products.models import Product
+from products.stock import set_stock_shards
+
+SKU = 'BENCH-HOT'
+
+
+class Command(BaseCommand):
+    help = 'Orders/sec on a single hot product at several client counts, with plain and sharded stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32], help='Concurrent clients')
+        parser.add_argument('--shards', type=int, default=8, help='Stock shards for the sharded run')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stderr.write(self.style.WARNING('Row lock contention only shows on PostgreSQL, '
+                                                 f'these numbers come from {connection.vendor}.'))
+
+        # the clients run in their own connections, so the sample rows are committed and deleted at the end
+        customer = Customer.objects.create(full_name='Bench customer', email='bench-hot@example.com')
+        product = Product.objects.create(name='Bench hot product', sku=SKU, price='10.00', stock=0)
+        with self.hold_outbox_drain():
+            try:
+                for shards in (0, options['shards']):
+                    label = f'{shards} shards' if shards else 'single row'
+                    for clients in options['clients']:
+                        set_stock_shards(product.id, shards, total=10 ** 9)
+                        created, failed = self.run(customer.id, product.id, clients, options['duration'])
+                        self.stdout.write(f'{label:>10}  clients {clients:>3}: '
+                                          f'{created / options["duration"]:9.1f} orders/s  ({failed} failed)')
+            finally:
+                # the order.created events of the benchmark orders must never reach the sink
+                orders = Order.objects.filter(customer=customer)
+                OutboxEvent.objects.filter(aggregate_id__in=orders.values('id')).delete()
+                StockReservation.objects.filter(order__in=orders).delete()
+                orders.delete()
+                product.delete()
+                customer.delete()
+
+    @contextmanager
+    def hold_outbox_drain(self):
+        # on PostgreSQL, keep the outbox counter (events.outbox.publish_pending) locked from
+        # another connection: a drain running meanwhile waits until the events are deleted
+        if connection.vendor != 'postgresql':
+            yield
+            return
+        locked, release, errors = threading.Event(), threading.Event(), []
+
+        def holder():
+            try:
+                with transaction.atomic():
+                    OutboxSequence.objects.select_for_update().get_or_create(pk=1)
+                    locked.set()
+                    release.wait()
+            except Exception as e:
+                errors.append(e)
+                locked.set()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        locked.wait()
+        try:
+            if errors:
+                raise CommandError(f'Could not lock the outbox counter: {errors[0]}')
+            yield
+        finally:
+            release.set()
+            thread.join()
+
+    def run(self, customer_id, product_id, clients, duration):
+        counts = [[0, 0] for _ in range(clients)]
+        payload = {'customer': customer_id, 'items': [{'product': product_id, 'quantity': 1}]}
+        start = threading.Barrier(clients)
+
+        def client(count):
+            try:
+                start.wait()
+                deadline = time.monotonic() + duration
+                while time.monotonic() < deadline:
+                    serializer = OrderSerializer(data=payload)
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save()
+                        count[0] += 1
+                    except Exception:
+                        count[1] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=client, args=(count,)) for count in counts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(c[0] for c in counts), sum(c[1] for c in counts)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import Product
+from products.stock import set_stock_shards
+
+
+class Command(BaseCommand):
+    help = 'Split the stock of hot products over N counter rows (--shards 0 puts it back in Product.stock)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('skus', nargs='+', help='SKUs of the products to (un)shard')
+        parser.add_argument('--shards', type=int, default=8, help='Number of stock shards, 0 to unshard')
+
+    def handle(self, *args, **options):
+        shards = options['shards']
+        if shards < 0:
+            raise CommandError('--shards must be 0 or more')
+
+        products = dict(Product.objects.filter(sku__in=options['skus']).values_list('sku', 'id'))
+        missing = sorted(set(options['skus']) - set(products))
+        if missing:
+            raise CommandError(f"Unknown SKUs: {', '.join(missing)}")
+
+        for sku, product_id in products.items():
+            set_stock_shards(product_id, shards)
+            stock = Product.objects.get(id=product_id).total_stock
+            self.stdout.write(f'{sku}: {shards} shards, stock {stock}')
+        self.stdout.write(self.style.SUCCESS(f'Resharded {len(products)} products.'))
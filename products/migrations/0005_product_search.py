@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:19
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core.db import PostgresOnlyRunSQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_product_sku_upper_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # same expression as products.search.search_vector()
+        PostgresOnlyRunSQL(
+            sql="""
+                UPDATE products_product p SET search_vector =
+                    setweight(to_tsvector('simple', p.name), 'A')
+                    || setweight(to_tsvector('simple', p.sku), 'A')
+                    || setweight(to_tsvector('simple', COALESCE((
+                        SELECT string_agg(l.name, ' ')
+                        FROM products_label l
+                        JOIN products_product_labels pl ON pl.label_id = l.id
+                        WHERE pl.product_id = p.id), '')), 'B');
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        PostgresOnlyRunSQL(
+            sql='CREATE INDEX IF NOT EXISTS product_search_vector_idx ON products_product USING gin (search_vector);',
+            reverse_sql='DROP INDEX IF EXISTS product_search_vector_idx;',
+        ),
+        # typeahead: prefix range + ORDER BY on UPPER(col) COLLATE "C" (see products.search.typeahead)
+        PostgresOnlyRunSQL(
+            sql='CREATE INDEX IF NOT EXISTS product_name_upper_c_idx ON products_product ((UPPER(name::text) COLLATE "C"));',
+            reverse_sql='DROP INDEX IF EXISTS product_name_upper_c_idx;',
+        ),
+        PostgresOnlyRunSQL(
+            sql='CREATE INDEX IF NOT EXISTS product_sku_upper_c_idx ON products_product ((UPPER(sku::text) COLLATE "C"));',
+            reverse_sql='DROP INDEX IF EXISTS product_sku_upper_c_idx;',
+        ),
+    ]
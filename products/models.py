@@ -1,6 +1,8 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.db.models import Q
+from django.db.models.functions import Upper
 from decimal import Decimal
 
 
@@ -16,13 +18,52 @@ class Product(models.Model):
     sku = models.CharField(max_length=50, unique=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal(0))])
     stock = models.IntegerField(validators=[MinValueValidator(0)])
+    # >0: the stock is split over this many ProductStockShard rows and `stock` stays 0 (see products.stock)
+    stock_shards = models.PositiveSmallIntegerField(default=0)
     labels = models.ManyToManyField(Label, related_name='products')
+    # name, sku and label names for full-text search, kept up to date by products.search (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"{self.name} ({self.sku})"
+
+    @property
+    def total_stock(self):
+        """
+        Stock the API shows: `stock`, plus the shards of a sharded product
+        (annotated by products.stock.with_shard_stock when reading many products).
+        """
+        if not self.stock_shards:
+            return self.stock
+        if hasattr(self, 'shard_stock'):
+            return self.stock + (self.shard_stock or 0)
+        return self.stock + sum(shard.stock for shard in self.shards.all())
     
     class Meta:
         ordering = ['id']
         constraints = [
             models.CheckConstraint(check=Q(stock__gte=0), name='stock_gte_0'),
         ]
+        indexes = [
+            # ProductFilter.tag (sku__iexact) compares UPPER(sku) on PostgreSQL
+            models.Index(Upper('sku'), name='product_sku_upper_idx'),
+        ]
+
+
+class ProductStockShard(models.Model):
+    """
+    Part of the stock of a hot product. Orders take stock from any shard that has
+    enough, so concurrent orders for the same product don't queue on one row lock.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='shards')
+    shard = models.PositiveSmallIntegerField()
+    stock = models.IntegerField(validators=[MinValueValidator(0)])
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard'], name='stock_shard_unique'),
+            models.CheckConstraint(check=Q(stock__gte=0), name='stock_shard_gte_0'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} shard {self.shard}: {self.stock}"
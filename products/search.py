@@ -0,0 +1,148 @@
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Collate, Upper
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .models import Label, Product
+
+SEARCH_CONFIG = 'simple'
+
+
+def _is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def search_vector():
+    """
+    Expression for Product.search_vector: name and sku (weight A) and the names of
+    the product's labels (weight B).
+    """
+    labels = (Label.objects.filter(products=OuterRef('pk')).order_by().values('products')
+              .annotate(names=StringAgg('name', ' ')).values('names'))
+    return (SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('sku', weight='A', config=SEARCH_CONFIG)
+            + SearchVector(Coalesce(Subquery(labels), Value('')), weight='B', config=SEARCH_CONFIG))
+
+
+def refresh_search_vectors(products):
+    """
+    Recompute search_vector for a Product queryset with one UPDATE. Only PostgreSQL
+    has full-text search; elsewhere the vector is left empty (see search_products).
+    """
+    if _is_postgres():
+        products.update(search_vector=search_vector())
+
+
+def _prefix_query(text):
+    # every word as a prefix ("lap mou" -> lap:* & mou:*) so partial names match
+    terms = re.findall(r'\w+', text)
+    return ' & '.join(f"{term}:*" for term in terms)
+
+
+def search_products(queryset, text):
+    """
+    Filter products by name, sku and label names and annotate `search_rank`.
+
+    PostgreSQL uses the stored search_vector (GIN indexed) with prefix matching and
+    ts_rank. Other databases (SQLite in tests) fall back to icontains, ranking
+    name prefixes first.
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+
+    if _is_postgres():
+        query = _prefix_query(text)
+        if not query:
+            # no words to search for (only punctuation); keep search_rank for the ordering
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        query = SearchQuery(query, search_type='raw', config=SEARCH_CONFIG)
+        # ts_rank is a float4: as float8 the value read back compares equal in a keyset cursor
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+
+    matches = Product.objects.filter(
+        Q(name__icontains=text) | Q(sku__icontains=text) | Q(labels__name__icontains=text)).values('id')
+    return queryset.filter(id__in=matches).annotate(search_rank=Case(
+        When(name__istartswith=text, then=Value(2)),
+        When(Q(name__icontains=text) | Q(sku__icontains=text), then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+
+
+def _prefix_key(field):
+    # with the "C" collation a btree index on UPPER(field) serves both LIKE 'X%' and the ordering
+    key = Upper(field)
+    return Collate(key, 'C') if _is_postgres() else key
+
+
+def typeahead(text, limit=10):
+    """
+    Up to `limit` products whose name (or else sku) starts with `text`, as
+    {'id', 'name', 'sku'} dicts, alphabetically. On PostgreSQL each lookup is a
+    range scan of the UPPER(name) / UPPER(sku) "C" collation indexes that stops
+    after `limit` rows.
+    """
+    prefix = text.strip().upper()
+    if not prefix:
+        return []
+    rows = []
+    for field in ('name', 'sku'):
+        matches = (Product.objects.annotate(key=_prefix_key(field)).filter(key__startswith=prefix)
+                   .exclude(id__in=[row['id'] for row in rows]).order_by('key', 'id')
+                   .values('id', 'name', 'sku')[:limit - len(rows)])
+        rows += matches
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def _product_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'name', 'sku'} & set(update_fields):
+        refresh_search_vectors(Product.objects.filter(pk=instance.pk))
+
+
+def _remember_label_products(instance):
+    # the links are gone after a clear/delete, keep the products to refresh
+    if _is_postgres():
+        instance._search_product_ids = list(Product.objects.filter(labels=instance).values_list('id', flat=True))
+
+
+def _labels_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        _remember_label_products(instance)
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        product_ids = [instance.pk]
+    elif action == 'post_clear':
+        product_ids = getattr(instance, '_search_product_ids', [])
+    else:
+        product_ids = pk_set
+    refresh_search_vectors(Product.objects.filter(pk__in=product_ids))
+
+
+def _label_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_search_vectors(Product.objects.filter(labels=instance))
+
+
+def _label_deleting(sender, instance, **kwargs):
+    _remember_label_products(instance)
+
+
+def _label_deleted(sender, instance, **kwargs):
+    refresh_search_vectors(Product.objects.filter(pk__in=getattr(instance, '_search_product_ids', [])))
+
+
+def connect_search_signals():
+    post_save.connect(_product_saved, sender=Product, dispatch_uid='products.search.product_saved')
+    post_save.connect(_label_saved, sender=Label, dispatch_uid='products.search.label_saved')
+    pre_delete.connect(_label_deleting, sender=Label, dispatch_uid='products.search.label_deleting')
+    post_delete.connect(_label_deleted, sender=Label, dispatch_uid='products.search.label_deleted')
+    m2m_changed.connect(_labels_changed, sender=Product.labels.through, dispatch_uid='products.search.labels_changed')
@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils.functional import cached_property
 from rest_framework import serializers
 from .models import Product, Label
+from core.roles import get_user_roles
+from .stock import set_stock_shards
 
 class LabelSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,15 +13,33 @@ class LabelSerializer(serializers.ModelSerializer):
 
 class ProductSerializer(serializers.ModelSerializer):
     labels = LabelSerializer(many=True, read_only=True)
+    # summed over the shards for products with sharded stock
+    stock = serializers.IntegerField(source='total_stock', read_only=True)
 
     class Meta:
         model = Product
         fields = ['id', 'name', 'sku', 'price', 'stock', 'labels']
 
+    @cached_property
+    def _fast_price(self):
+        # bound field converter, so prices render exactly as the DRF field does
+        return self.fields['price'].to_representation
+
     def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        user = self.context['request'].user
-        if user.is_authenticated and user.groups.filter(name='Viewer').exists():
+        if settings.FAST_READ_SERIALIZERS:
+            # same output as the declared fields, without the per-field machinery
+            representation = {
+                'id': instance.id,
+                'name': instance.name,
+                'sku': instance.sku,
+                'price': self._fast_price(instance.price),
+                'stock': instance.total_stock,
+                'labels': [{'id': label.id, 'name': label.name} for label in instance.labels.all()],
+            }
+        else:
+            representation = super().to_representation(instance)
+        request = self.context.get('request')
+        if request is not None and get_user_roles(request).is_viewer:
             # For viewers, don't show stock info
             representation.pop('stock', None)
         return representation
@@ -30,3 +53,91 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         if value < 0:
             raise serializers.ValidationError("Stock cannot be negative.")
         return value
+
+    def update(self, instance, validated_data):
+        if not instance.stock_shards or 'stock' not in validated_data:
+            return super().update(instance, validated_data)
+        # a sharded product keeps its stock in the shards
+        stock = validated_data.pop('stock')
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            set_stock_shards(instance.id, instance.stock_shards, total=stock)
+        # the view's queryset annotated the old shard total
+        instance.stock, instance.shard_stock = 0, stock
+        return instance
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        representation['stock'] = instance.total_stock
+        return representation
+
+
+class BulkProductSerializer(serializers.Serializer):
+    # plain serializer: the sku uniqueness check is replaced by the upsert itself
+    sku = serializers.CharField(max_length=50)
+    name = serializers.CharField(max_length=200)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    stock = serializers.IntegerField(min_value=0)
+    labels = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+
+
+class BulkProductUpsertSerializer(serializers.Serializer):
+    products = serializers.ListField(child=serializers.JSONField(), allow_empty=False)
+
+    def validate_products(self, value):
+        if len(value) > settings.PRODUCTS_BULK_MAX_ROWS:
+            raise serializers.ValidationError(f"At most {settings.PRODUCTS_BULK_MAX_ROWS} products per request.")
+        return value
+
+
+class BulkStockDeltaSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=50)
+    delta = serializers.IntegerField()
+
+
+class BulkStockSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.JSONField(), allow_empty=False)
+
+    def validate_items(self, value):
+        if len(value) > settings.PRODUCTS_BULK_MAX_ROWS:
+            raise serializers.ValidationError(f"At most {settings.PRODUCTS_BULK_MAX_ROWS} items per request.")
+        return value
+
+
+class BulkRowErrorSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    sku = serializers.CharField(allow_null=True)
+    errors = serializers.DictField()
+
+
+class BulkProductUpsertResultSerializer(serializers.Serializer):
+    upserted = serializers.IntegerField()
+    labels_assigned = serializers.IntegerField()
+    failed = BulkRowErrorSerializer(many=True)
+
+
+class StockRowSerializer(serializers.Serializer):
+    sku = serializers.CharField()
+    stock = serializers.IntegerField()
+
+
+class RejectedStockRowSerializer(StockRowSerializer):
+    delta = serializers.IntegerField()
+
+
+class BulkStockResultSerializer(serializers.Serializer):
+    updated = StockRowSerializer(many=True)
+    rejected = RejectedStockRowSerializer(many=True)
+    not_found = serializers.ListField(child=serializers.CharField())
+    failed = BulkRowErrorSerializer(many=True)
+
+
+class TypeaheadSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    sku = serializers.CharField()
+
+
+class TypeaheadQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
@@ -0,0 +1,174 @@
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+
+from core.versioning import bump_version
+from .models import Label, Product
+from .search import refresh_search_vectors
+from .serializers import BulkProductSerializer, BulkStockDeltaSerializer
+from .stock import apply_stock_deltas, lock_shards, set_stock_shards
+
+UPSERT_FIELDS = ('name', 'price', 'stock')
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _validate_rows(rows, serializer_class):
+    valid, failed = [], []
+    for index, row in enumerate(rows):
+        serializer = serializer_class(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            failed.append({'index': index, 'sku': row.get('sku') if isinstance(row, dict) else None,
+                           'errors': serializer.errors})
+    return valid, failed
+
+
+def resolve_labels(names, chunk_size=None):
+    """
+    Return {name: label_id} for the given label names, creating the missing ones.
+    Names are looked up and created in batches of `chunk_size`.
+    """
+    chunk_size = chunk_size or settings.PRODUCTS_BULK_CHUNK_SIZE
+    names = sorted(set(names))
+    label_ids = {}
+    for chunk in _chunks(names, chunk_size):
+        found = dict(Label.objects.filter(name__in=chunk).values_list('name', 'id'))
+        missing = [name for name in chunk if name not in found]
+        if missing:
+            # a concurrent sync may create the same labels
+            Label.objects.bulk_create([Label(name=name) for name in missing], ignore_conflicts=True)
+            bump_version(Label)
+            found.update(Label.objects.filter(name__in=missing).values_list('name', 'id'))
+        label_ids.update(found)
+    return label_ids
+
+
+def upsert_products(rows, chunk_size=None):
+    """
+    Create or update products keyed by SKU.
+
+    Rows are validated first, then written in chunks of `chunk_size` with one
+    INSERT ... ON CONFLICT (sku) DO UPDATE per chunk, each chunk in its own
+    transaction. When a row has `labels` (names), the labels are resolved in
+    batches (created if missing) and added to the product; existing labels are kept.
+    A SKU that appears in more than one row is ambiguous: none of those rows is
+    written and all of them are reported in `failed`. The stock of products with
+    sharded stock is spread over their shards.
+
+    A chunk that fails to write is rolled back and its rows are reported in
+    `failed`; the chunks before and after it are kept. The version stamps are
+    bumped as each chunk commits.
+
+    Returns {'upserted': n, 'labels_assigned': n, 'failed': [{'index', 'sku', 'errors'}]},
+    where `labels_assigned` only counts links that didn't exist yet.
+    """
+    chunk_size = chunk_size or settings.PRODUCTS_BULK_CHUNK_SIZE
+    valid, failed = _validate_rows(rows, BulkProductSerializer)
+
+    rows_by_sku = {}
+    for index, data in valid:
+        rows_by_sku.setdefault(data['sku'], []).append((index, data))
+    by_sku = {}
+    for sku, same in rows_by_sku.items():
+        if len(same) == 1:
+            by_sku[sku] = same[0]
+            continue
+        rows_text = ', '.join(str(index) for index, _ in same)
+        failed += [{'index': index, 'sku': sku, 'errors': {'sku': [f"Duplicate SKU in this batch (rows {rows_text})."]}}
+                   for index, _ in same]
+
+    label_ids = resolve_labels(
+        [name for _, data in by_sku.values() for name in data.get('labels', ())], chunk_size)
+
+    through = Product.labels.through
+    upserted = assigned = 0
+    for chunk in _chunks(list(by_sku.values()), chunk_size):
+        try:
+            with transaction.atomic():
+                links = _upsert_chunk([data for _, data in chunk], label_ids)
+                bump_version(Product, Label, through)
+        except DatabaseError as e:
+            failed += [{'index': index, 'sku': data['sku'], 'errors': {'non_field_errors': [f"Not written: {e}"]}}
+                       for index, data in chunk]
+            continue
+        upserted += len(chunk)
+        assigned += links
+
+    failed.sort(key=lambda row: row['index'])
+    return {'upserted': upserted, 'labels_assigned': assigned, 'failed': failed}
+
+
+def _upsert_chunk(chunk, label_ids):
+    # one chunk of upsert_products, returns the number of label links inserted
+    Product.objects.bulk_create(
+        [Product(sku=data['sku'], **{field: data[field] for field in UPSERT_FIELDS}) for data in chunk],
+        update_conflicts=True,
+        unique_fields=['sku'],
+        update_fields=list(UPSERT_FIELDS),
+    )
+    inserted = 0
+    labelled = [data for data in chunk if data.get('labels')]
+    if labelled:
+        through = Product.labels.through
+        # ids are not returned for updated rows, fetch them by sku
+        product_ids = dict(Product.objects.filter(sku__in=[data['sku'] for data in labelled])
+                           .values_list('sku', 'id'))
+        wanted = {(product_ids[data['sku']], label_ids[name]) for data in labelled for name in data['labels']}
+        existing = set(through.objects.filter(product_id__in=product_ids.values())
+                       .values_list('product_id', 'label_id'))
+        links = [through(product_id=product_id, label_id=label_id) for product_id, label_id in sorted(wanted - existing)]
+        # a concurrent sync may add the same links
+        through.objects.bulk_create(links, ignore_conflicts=True)
+        inserted = len(links)
+    refresh_search_vectors(Product.objects.filter(sku__in=[data['sku'] for data in chunk]))
+    # the upsert wrote the new stock of sharded products in Product.stock, spread it over the shards
+    for product_id, shards, stock in (Product.objects.filter(sku__in=[data['sku'] for data in chunk], stock_shards__gt=0)
+                                      .values_list('id', 'stock_shards', 'stock')):
+        set_stock_shards(product_id, shards, total=stock)
+    return inserted
+
+
+def adjust_stock(rows):
+    """
+    Apply stock deltas keyed by SKU: stock = stock + delta, all in one UPDATE.
+
+    Deltas for the same SKU are added up. Products are locked in id order and a
+    delta that would leave the stock below zero (the stock_gte_0 constraint) is
+    rejected and reported, as are unknown SKUs; every other delta is applied.
+
+    Returns {'updated': [{'sku', 'stock'}], 'rejected': [{'sku', 'stock', 'delta'}],
+    'not_found': [sku, ...], 'failed': [{'index', 'sku', 'errors'}]}.
+    """
+    valid, failed = _validate_rows(rows, BulkStockDeltaSerializer)
+    deltas = {}
+    for _, data in valid:
+        deltas[data['sku']] = deltas.get(data['sku'], 0) + data['delta']
+
+    with transaction.atomic():
+        products = {p.sku: p for p in Product.objects.select_for_update().filter(sku__in=deltas.keys()).order_by('id')}
+        lock_shards(products.values())
+        stock = {sku: product.total_stock for sku, product in products.items()}
+        rejected = [
+            {'sku': sku, 'stock': stock[sku], 'delta': delta}
+            for sku, delta in deltas.items() if sku in products and stock[sku] + delta < 0
+        ]
+        rejected_skus = {row['sku'] for row in rejected}
+        accepted = {sku: delta for sku, delta in deltas.items() if sku in products and sku not in rejected_skus}
+        try:
+            with transaction.atomic():
+                apply_stock_deltas({products[sku].id: delta for sku, delta in accepted.items()})
+        except IntegrityError:
+            # the rows are locked, so this only happens if the check above is bypassed
+            rejected += [{'sku': sku, 'stock': stock[sku], 'delta': delta} for sku, delta in accepted.items()]
+            accepted = {}
+
+    return {
+        'updated': [{'sku': sku, 'stock': stock[sku] + delta} for sku, delta in accepted.items()],
+        'rejected': rejected,
+        'not_found': sorted(sku for sku in deltas if sku not in products),
+        'failed': failed,
+    }
@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models import (Case, F, IntegerField, OuterRef, Prefetch, Subquery, Sum, Value, When,
+                              prefetch_related_objects)
+from django.db.models.functions import Coalesce
+
+from core.versioning import bump_version
+from .models import Product, ProductStockShard
+
+
+def with_shard_stock(queryset):
+    """
+    Annotate `shard_stock`, the stock held in the shards, for Product.total_stock
+    without an extra query, and `available_stock` (stock plus shard_stock) to
+    filter or sort by that total. The subquery only runs for sharded products.
+    """
+    shard_stock = (ProductStockShard.objects.filter(product=OuterRef('pk')).order_by().values('product')
+                   .annotate(total=Sum('stock')).values('total'))
+    return queryset.annotate(shard_stock=Case(
+        When(stock_shards=0, then=Value(0)),
+        default=Coalesce(Subquery(shard_stock), Value(0)),
+        output_field=IntegerField(),
+    )).annotate(available_stock=F('stock') + F('shard_stock'))
+
+
+def lock_products(product_ids):
+    """
+    Lock the given products with SELECT ... FOR UPDATE and return them keyed by id.
+    Rows are always locked in id order so concurrent writers can't deadlock.
+    The shards of sharded products are locked too, so `total_stock` is current.
+    """
+    products = Product.objects.select_for_update().filter(id__in=set(product_ids)).order_by('id')
+    products = {p.id: p for p in products}
+    lock_shards(products.values())
+    return products
+
+
+def lock_shards(products):
+    """
+    Lock the shards of the sharded products among `products` (already locked),
+    in (product, shard) order, and prefetch them as `shards`.
+    """
+    sharded = [p for p in products if p.stock_shards]
+    if sharded:
+        prefetch_related_objects(sharded, Prefetch(
+            'shards', queryset=ProductStockShard.objects.select_for_update().order_by('product_id', 'shard')))
+
+
+def _split(total, parts):
+    # as even as possible, the first shards get the remainder
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def _shard_deltas(shards, delta):
+    # refills are spread evenly, decrements taken from the fullest shards first
+    if delta > 0:
+        return {shard.id: part for shard, part in zip(shards, _split(delta, len(shards))) if part}
+    deltas = {}
+    remaining = -delta
+    for shard in sorted(shards, key=lambda s: -s.stock):
+        taken = min(shard.stock, remaining)
+        if taken:
+            deltas[shard.id] = -taken
+            remaining -= taken
+    if remaining:
+        # not enough stock: let the stock_shard_gte_0 constraint reject it, like stock_gte_0 does
+        deltas[shards[0].id] = deltas.get(shards[0].id, 0) - remaining
+    return deltas
+
+
+def _case_update(queryset, deltas):
+    delta_case = Case(
+        *[When(id=pk, then=Value(delta)) for pk, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return queryset.filter(id__in=deltas.keys()).update(stock=F('stock') + delta_case)
+
+
+def apply_stock_deltas(deltas):
+    """
+    Apply {product_id: delta} to Product.stock in a single UPDATE statement
+    (stock = stock + CASE id WHEN ... END). Returns the number of updated rows.
+
+    Sharded products are skipped by that UPDATE and get one UPDATE of their
+    shards each: refills are spread evenly, decrements taken from the fullest shards.
+    """
+    deltas = {pid: delta for pid, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    updated = _case_update(Product.objects.filter(stock_shards=0), deltas)
+    if updated < len(deltas):
+        shards = {}
+        for shard in (ProductStockShard.objects.select_for_update()
+                      .filter(product_id__in=deltas.keys()).order_by('product_id', 'shard')):
+            shards.setdefault(shard.product_id, []).append(shard)
+        for pid, product_shards in shards.items():
+            _case_update(ProductStockShard.objects, _shard_deltas(product_shards, deltas[pid]))
+        updated += len(shards)
+    bump_version(Product)
+    return updated
+
+
+def take_stock(product_id, quantity):
+    """
+    Decrement the stock of one product only if enough is left, in a single
+    conditional UPDATE (no SELECT ... FOR UPDATE first). Returns True if taken.
+    The row stays locked until the transaction ends, so callers do it last.
+
+    For a sharded product the quantity comes from a random shard that has enough
+    and isn't locked by another order (SKIP LOCKED); only if there is none are all
+    its shards locked and the quantity taken across them.
+    """
+    if Product.objects.filter(id=product_id, stock_shards=0, stock__gte=quantity).update(stock=F('stock') - quantity):
+        return True
+    if not Product.objects.filter(id=product_id, stock_shards__gt=0).exists():
+        return False
+
+    shard_id = (ProductStockShard.objects.select_for_update(skip_locked=True)
+                .filter(product_id=product_id, stock__gte=quantity).order_by('?')
+                .values_list('id', flat=True).first())
+    if shard_id is not None:
+        return bool(ProductStockShard.objects.filter(id=shard_id, stock__gte=quantity)
+                    .update(stock=F('stock') - quantity))
+
+    shards = list(ProductStockShard.objects.select_for_update().filter(product_id=product_id).order_by('shard'))
+    if sum(shard.stock for shard in shards) < quantity:
+        return False
+    _case_update(ProductStockShard.objects, _shard_deltas(shards, -quantity))
+    return True
+
+
+def set_stock_shards(product_id, shards, total=None):
+    """
+    Split the stock of a product over `shards` counter rows (0 puts it back in
+    Product.stock). The stock is kept, or set to `total` when given. Rewrites the
+    shards, so it's meant for flagging hot products, not for the order path.
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(id=product_id)
+        lock_shards([product])
+        if total is None:
+            total = product.total_stock
+
+        ProductStockShard.objects.filter(product=product).delete()
+        ProductStockShard.objects.bulk_create([
+            ProductStockShard(product=product, shard=index, stock=stock)
+            for index, stock in enumerate(_split(total, shards) if shards else [])
+        ])
+        Product.objects.filter(id=product_id).update(stock=0 if shards else total, stock_shards=shards)
+        bump_version(Product)
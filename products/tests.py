@@ -1,3 +1,330 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from orders.tests import BaseAPITestCase, get_results
+from products.models import Label, Product, ProductStockShard
+from products.search import search_products
+
+
+class ViewerRolesTests(BaseAPITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_roles_are_resolved_once_per_request_and_cached(self):
+        """
+        Los grupos/permisos del usuario se consultan una vez por request (no por producto)
+        y luego se leen del cache compartido.
+        """
+        for i in range(8):
+            Product.objects.create(name=f"P{i}", sku=f"SKU-{i}", price=1, stock=1)
+        client = self.auth_client(self.tok_viewer)
+
+        def group_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                resp = client.get(reverse("product-list"))
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(all("stock" not in p for p in get_results(resp.data)))
+            return [q for q in ctx.captured_queries if "auth_group" in q["sql"]]
+
+        self.assertEqual(len(group_queries()), 2)  # nombres de grupos + permisos de grupos
+        self.assertEqual(group_queries(), [])
+
+        # cambiar de grupo invalida el cache
+        self.user_viewer.groups.set([self.grp_manager])
+        resp = client.get(reverse("product-list"))
+        self.assertIn("stock", get_results(resp.data)[0])
+
+
+class ProductResponseCacheTests(BaseAPITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, client, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(url, params or {})
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp, [q for q in ctx.captured_queries if "products_product" in q["sql"]]
+
+    def test_cache_per_role_and_invalidation_on_writes(self):
+        """
+        Las lecturas de productos se cachean por rol y filtros; escrituras de productos,
+        etiquetas y los cambios de stock de las órdenes invalidan el cache.
+        """
+        manager = self.auth_client(self.tok_manager)
+        viewer = self.auth_client(self.tok_viewer)
+        url = reverse("product-list")
+
+        resp, queries = self.get(manager, url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        resp, queries = self.get(manager, url)
+        self.assertEqual((resp["X-Cache"], queries), ("HIT", []))
+        self.assertIn("stock", get_results(resp.data)[0])
+
+        # otro rol u otros filtros no comparten la entrada
+        resp, _ = self.get(viewer, url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertNotIn("stock", get_results(resp.data)[0])
+        self.assertEqual(self.get(manager, url, {"min_price": 60})[0]["X-Cache"], "MISS")
+
+        # asignar una etiqueta invalida
+        manager.post(reverse("product-labels", args=[self.prod.id]), {"label_name": "Promo"}, format="json")
+        resp, _ = self.get(manager, url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(get_results(resp.data)[0]["labels"][0]["name"], "Promo")
+        self.assertEqual(self.get(manager, url)[0]["X-Cache"], "HIT")
+
+        # crear una orden descuenta stock e invalida
+        manager.post(reverse("order-list"),
+                     {"customer": self.cust.id, "items": [{"product": self.prod.id, "quantity": 2}]}, format="json")
+        resp, _ = self.get(manager, url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(get_results(resp.data)[0]["stock"], 8)
+
+        # renombrar una etiqueta invalida también la lista de etiquetas
+        self.assertEqual(self.get(manager, reverse("label-list"))[0]["X-Cache"], "MISS")
+        manager.patch(reverse("label-detail", args=[get_results(resp.data)[0]["labels"][0]["id"]]),
+                      {"name": "Oferta"}, format="json")
+        resp, _ = self.get(manager, reverse("label-list"))
+        self.assertEqual((resp["X-Cache"], get_results(resp.data)[0]["name"]), ("MISS", "Oferta"))
+
+
+class ShardedStockTests(BaseAPITestCase):
+    def shard_stock(self):
+        return list(ProductStockShard.objects.filter(product=self.prod).order_by("shard").values_list("stock", flat=True))
+
+    def test_orders_and_writes_on_sharded_stock(self):
+        """
+        Con stock repartido en shards la API muestra la suma; las órdenes descuentan de
+        los shards (aunque ninguno alcance solo), cancelar repone y PATCH redistribuye.
+        """
+        call_command("shard_stock", self.prod.sku, shards=3, stdout=StringIO())
+        self.assertEqual(self.shard_stock(), [4, 3, 3])
+        client = self.auth_client(self.tok_manager)
+        self.assertEqual(client.get(reverse("product-detail", args=[self.prod.id])).data["stock"], 10)
+
+        first = client.post(reverse("order-list"), {"customer": self.cust.id,
+                                                    "items": [{"product": self.prod.id, "quantity": 2}]}, format="json")
+        self.assertEqual(first.status_code, 201, first.data)
+        second = client.post(reverse("order-list"), {"customer": self.cust.id,
+                                                     "items": [{"product": self.prod.id, "quantity": 7}]}, format="json")
+        self.assertEqual(second.status_code, 201, second.data)
+        self.assertEqual(sum(self.shard_stock()), 1)
+        resp = client.post(reverse("order-list"), {"customer": self.cust.id,
+                                                   "items": [{"product": self.prod.id, "quantity": 2}]}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+        client.post(reverse("order-cancel", args=[second.data["id"]]))
+        self.assertEqual(sum(self.shard_stock()), 8)
+        products = get_results(client.get(reverse("product-list")).data)
+        self.assertEqual({p["sku"]: p["stock"] for p in products}, {self.prod.sku: 8, self.prod2.sku: 5})
+
+        resp = client.patch(reverse("product-detail", args=[self.prod.id]), {"stock": 20}, format="json")
+        self.assertEqual((resp.status_code, resp.data["stock"]), (200, 20))
+        self.assertEqual(self.shard_stock(), [7, 7, 6])
+        self.prod.refresh_from_db()
+        self.assertEqual((self.prod.stock, self.prod.stock_shards), (0, 3))
+
+        call_command("shard_stock", self.prod.sku, shards=0, stdout=StringIO())
+        self.prod.refresh_from_db()
+        self.assertEqual((self.prod.stock, self.shard_stock()), (20, []))
+
+
+    def test_ordering_by_stock_uses_the_shards_total(self):
+        """
+        ?ordering=stock ordena por el stock que muestra la API: el de un producto con
+        shards es la suma de sus shards (su columna stock queda en 0). También en modo cursor.
+        """
+        call_command("shard_stock", self.prod.sku, shards=3, stdout=StringIO())
+        Product.objects.create(name="Monitor", sku="MON-001", price=300, stock=7)
+        client = self.auth_client(self.tok_manager)
+        expected = [(self.prod2.sku, 5), ("MON-001", 7), (self.prod.sku, 10)]
+        for params, rows in [({"ordering": "stock"}, expected),
+                             ({"ordering": "-stock"}, expected[::-1]),
+                             ({"ordering": "stock", "pagination": "cursor"}, expected)]:
+            resp = client.get(reverse("product-list"), params)
+            self.assertEqual(resp.status_code, 200, resp.data)
+            self.assertEqual([(p["sku"], p["stock"]) for p in resp.data["results"]], rows, params)
+
+
+class BulkCatalogTests(BaseAPITestCase):
+    def test_bulk_upsert_by_sku_with_labels(self):
+        """
+        bulk-upsert crea o actualiza productos por SKU, asigna etiquetas por nombre
+        (creando las que faltan) y reporta las filas inválidas por índice.
+        """
+        Label.objects.create(name="Promo")
+        client = self.auth_client(self.tok_manager)
+        rows = [
+            {"sku": self.prod.sku, "name": "Renamed", "price": "120.00", "stock": 3, "labels": ["Promo", "Nuevo"]},
+            {"sku": "NEW-1", "name": "Nuevo 1", "price": "10.00", "stock": 7},
+            {"sku": "NEW-2", "name": "Nuevo 2", "price": "5.00", "stock": 1, "labels": ["Nuevo"]},
+            {"sku": "BAD", "name": "Sin stock", "price": "1.00", "stock": -1},
+        ]
+        with self.settings(PRODUCTS_BULK_CHUNK_SIZE=2):
+            resp = client.post(reverse("product-bulk-upsert"), {"products": rows}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual((resp.data["upserted"], resp.data["labels_assigned"]), (3, 3))
+        self.assertEqual([(f["index"], f["sku"]) for f in resp.data["failed"]], [(3, "BAD")])
+
+        self.prod.refresh_from_db()
+        self.assertEqual((self.prod.name, self.prod.price, self.prod.stock), ("Renamed", Decimal("120.00"), 3))
+        self.assertEqual(set(self.prod.labels.values_list("name", flat=True)), {"Promo", "Nuevo"})
+        self.assertEqual(Label.objects.filter(name="Nuevo").count(), 1)
+        self.assertTrue(Product.objects.filter(sku="NEW-2", labels__name="Nuevo").exists())
+        self.assertFalse(Product.objects.filter(sku="BAD").exists())
+
+        # un Seller no puede modificar el catálogo
+        resp = self.auth_client(self.tok_seller).post(reverse("product-bulk-upsert"), {"products": rows}, format="json")
+        self.assertEqual(resp.status_code, 403)
+
+    def test_bulk_upsert_reports_failed_chunks_and_only_new_labels(self):
+        """
+        Un bloque que falla al escribirse se revierte y sus filas se reportan en `failed`
+        (los demás bloques quedan escritos); `labels_assigned` no cuenta etiquetas que
+        el producto ya tenía.
+        """
+        self.prod.labels.add(Label.objects.create(name="Promo"))
+        client = self.auth_client(self.tok_manager)
+        rows = [
+            {"sku": self.prod.sku, "name": "Mouse", "price": "100.00", "stock": 10, "labels": ["Promo", "Nuevo"]},
+            {"sku": "NEW-1", "name": "Nuevo 1", "price": "10.00", "stock": 7},
+            {"sku": "NEW-2", "name": "Nuevo 2", "price": "5.00", "stock": 1},
+        ]
+        with self.settings(PRODUCTS_BULK_CHUNK_SIZE=1), \
+                mock.patch("products.services.refresh_search_vectors", side_effect=[None, DatabaseError("boom"), None]):
+            resp = client.post(reverse("product-bulk-upsert"), {"products": rows}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual((resp.data["upserted"], resp.data["labels_assigned"]), (2, 1))
+        self.assertEqual([(f["index"], f["sku"]) for f in resp.data["failed"]], [(1, "NEW-1")])
+        self.assertEqual(set(Product.objects.filter(sku__startswith="NEW-").values_list("sku", flat=True)), {"NEW-2"})
+
+    def test_bulk_upsert_reports_duplicate_skus(self):
+        """
+        Un SKU repetido en el mismo lote es ambiguo: no se escribe ninguna de sus filas
+        y todas se reportan en `failed`; el resto del lote se guarda.
+        """
+        client = self.auth_client(self.tok_manager)
+        rows = [
+            {"sku": "DUP-1", "name": "Primero", "price": "10.00", "stock": 1},
+            {"sku": "NEW-1", "name": "Nuevo 1", "price": "10.00", "stock": 7},
+            {"sku": "DUP-1", "name": "Segundo", "price": "20.00", "stock": 2},
+        ]
+        resp = client.post(reverse("product-bulk-upsert"), {"products": rows}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data["upserted"], 1)
+        self.assertEqual([(f["index"], f["sku"]) for f in resp.data["failed"]], [(0, "DUP-1"), (2, "DUP-1")])
+        self.assertIn("rows 0, 2", resp.data["failed"][0]["errors"]["sku"][0])
+        self.assertFalse(Product.objects.filter(sku="DUP-1").exists())
+        self.assertTrue(Product.objects.filter(sku="NEW-1").exists())
+
+    def test_bulk_stock_deltas_report_constraint_violations(self):
+        """
+        bulk-stock aplica stock = stock + delta en un UPDATE y rechaza los SKUs
+        que dejarían el stock negativo (stock_gte_0) o que no existen.
+        """
+        client = self.auth_client(self.tok_manager)
+        items = [
+            {"sku": self.prod.sku, "delta": -4},
+            {"sku": self.prod.sku, "delta": 1},
+            {"sku": self.prod2.sku, "delta": -6},
+            {"sku": "MISSING", "delta": 3},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.post(reverse("product-bulk-stock"), {"items": items}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data["updated"], [{"sku": self.prod.sku, "stock": 7}])
+        self.assertEqual(resp.data["rejected"], [{"sku": self.prod2.sku, "stock": 5, "delta": -6}])
+        self.assertEqual(resp.data["not_found"], ["MISSING"])
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "products_product"')]
+        self.assertEqual(len(updates), 1)
+
+        self.prod.refresh_from_db()
+        self.prod2.refresh_from_db()
+        self.assertEqual((self.prod.stock, self.prod2.stock), (7, 5))
+
+
+class ProductSearchTests(BaseAPITestCase):
+    def setUp(self):
+        cache.clear()
+        Product.objects.create(name="Laptop Pro 14", sku="LAP-014", price=1000, stock=3)
+        Product.objects.create(name="Mochila para laptop", sku="BAG-001", price=50, stock=9)
+        monitor = Product.objects.create(name="Monitor 24", sku="MON-024", price=200, stock=4)
+        monitor.labels.add(Label.objects.create(name="Periféricos"))
+
+    def test_search_matches_name_sku_and_labels_ranked(self):
+        """
+        ?search= busca por nombre parcial, SKU y etiquetas; los nombres que empiezan
+        con el texto aparecen primero.
+        """
+        client = self.auth_client(self.tok_manager)
+        resp = client.get(reverse("product-list"), {"search": "lap"})
+        self.assertEqual([p["sku"] for p in get_results(resp.data)], ["LAP-014", "BAG-001"])
+
+        resp = client.get(reverse("product-list"), {"search": "perif"})
+        self.assertEqual([p["sku"] for p in get_results(resp.data)], ["MON-024"])
+
+        resp = client.get(reverse("product-list"), {"search": "lap", "ordering": "-price"})
+        self.assertEqual([p["sku"] for p in get_results(resp.data)], ["LAP-014", "BAG-001"])
+
+    def test_search_with_cursor_pagination_walks_ranked_pages(self):
+        """
+        ?search= con ?pagination=cursor pagina por relevancia (y id como desempate)
+        sin repetir ni saltear productos, en ambas direcciones.
+        """
+        Product.objects.bulk_create(
+            [Product(name=f"Laptop {i}", sku=f"LAPX-{i}", price=10, stock=1) for i in range(12)]
+            + [Product(name=f"Funda laptop {i}", sku=f"CASE-{i}", price=5, stock=1) for i in range(5)])
+        expected = list(search_products(Product.objects.all(), "lap").order_by("-search_rank", "id")
+                        .values_list("sku", flat=True))
+        client = self.auth_client(self.tok_manager)
+
+        skus, pages = [], []
+        resp = client.get(reverse("product-list"), {"search": "lap", "pagination": "cursor"})
+        while True:
+            self.assertEqual(resp.status_code, 200, resp.data)
+            pages.append(resp)
+            skus += [p["sku"] for p in resp.data["results"]]
+            if not resp.data["next"]:
+                break
+            resp = client.get(resp.data["next"])
+        self.assertEqual(skus, expected)
+        self.assertEqual(len(pages), 2)
+
+        previous = client.get(pages[1].data["previous"])
+        self.assertEqual([p["sku"] for p in previous.data["results"]], expected[:10])
+
+    def test_search_without_words_returns_an_empty_ranked_page(self):
+        """
+        En PostgreSQL un ?search= con solo puntuación no tiene términos: devuelve una
+        página vacía (también en modo cursor), sin fallar al ordenar por relevancia.
+        """
+        client = self.auth_client(self.tok_manager)
+        with mock.patch("products.search._is_postgres", return_value=True):
+            for params in ({"search": "-"}, {"search": "!?", "pagination": "cursor"}):
+                resp = client.get(reverse("product-list"), params)
+                self.assertEqual(resp.status_code, 200, resp.data)
+                self.assertEqual(resp.data["results"], [])
+
+    def test_typeahead_prefix_matches(self):
+        """
+        typeahead devuelve los primeros N productos cuyo nombre (o SKU) empieza con el texto.
+        """
+        client = self.auth_client(self.tok_viewer)
+        resp = client.get(reverse("product-typeahead"), {"q": "la"})
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual([p["sku"] for p in resp.data], ["LAP-014"])
+
+        resp = client.get(reverse("product-typeahead"), {"q": "mo", "limit": 5})
+        self.assertEqual([p["sku"] for p in resp.data], ["BAG-001", "MON-024", "MOU-001"])  # Mochila, Monitor, Mouse
+        self.assertEqual(set(resp.data[0]), {"id", "name", "sku"})
+
+        # sin coincidencias por nombre, se completa con prefijos de SKU
+        resp = client.get(reverse("product-typeahead"), {"q": "bag-"})
+        self.assertEqual([p["sku"] for p in resp.data], ["BAG-001"])
@@ -1,8 +1,15 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, LabelViewSet
+from .views import AsyncLabelView, AsyncProductView, ProductViewSet, LabelViewSet
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'labels', LabelViewSet, basename='label')
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # async read-only endpoints (core.async_views), for ASGI deployments
+    path('async/products/', AsyncProductView.as_view(), name='product-async-list'),
+    path('async/products/<int:pk>/', AsyncProductView.as_view(), name='product-async-detail'),
+    path('async/labels/', AsyncLabelView.as_view(), name='label-async-list'),
+    path('async/labels/<int:pk>/', AsyncLabelView.as_view(), name='label-async-detail'),
+]
@@ -4,21 +4,46 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import IntegrityError
-from rest_framework.exceptions import ValidationError
-from rest_framework.filters import OrderingFilter
+from django.db.models import prefetch_related_objects
+from rest_framework.exceptions import PermissionDenied, ValidationError
 
+from drf_spectacular.utils import extend_schema
+
+from core.async_views import AsyncReadOnlyView
+from core.cache import CachedResponseMixin, ConditionalGetMixin
+from core.roles import user_has_perms
+from core.streaming import StreamingListMixin
 from .models import Product, Label
-from .serializers import ProductSerializer, ProductCreateUpdateSerializer, LabelSerializer
-from .filters import ProductFilter
+from .serializers import (
+    BulkProductUpsertResultSerializer, BulkProductUpsertSerializer, BulkStockResultSerializer, BulkStockSerializer,
+    LabelSerializer, ProductCreateUpdateSerializer, ProductSerializer, TypeaheadQuerySerializer, TypeaheadSerializer,
+)
+from .search import typeahead
+from .services import adjust_stock, upsert_products
+from .stock import with_shard_stock
+from .filters import ProductFilter, ProductOrderingFilter
 
 
 
 # Create your views here.
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+def product_ordering(query_params):
+    # ?search= results are ranked, unless ?ordering= says otherwise
+    if query_params.get('search', '').strip():
+        return ['-search_rank', 'id']
+    return ['id']
+
+
+class ProductViewSet(StreamingListMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = with_shard_stock(Product.objects.prefetch_related('labels'))
+    cache_dependencies = (Product, Label, Product.labels.through)
+    filter_backends = [DjangoFilterBackend, ProductOrderingFilter]
     filterset_class = ProductFilter
-    ordering = ['id']
+    ordering_fields = ['id', 'name', 'sku', 'price', 'stock']
+
+    @property
+    def ordering(self):
+        request = getattr(self, 'request', None)
+        return product_ordering(request.query_params if request is not None else {})
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -49,6 +74,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Provide label_id or label_name'}, status=status.HTTP_400_BAD_REQUEST)
         
         product.labels.add(label)
+        prefetch_related_objects([product], 'labels')
         return Response(ProductSerializer(product, context={'request': request}).data, status=status.HTTP_200_OK)
 
     # DELETE /products/{id}/remove_label/ -> remove label from product
@@ -61,8 +87,60 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response({"error": "Label not found"}, status=status.HTTP_404_NOT_FOUND)
 
         product.labels.remove(label)
-        return Response(ProductSerializer(product).data, status=status.HTTP_200_OK)
-    
-class LabelViewSet(viewsets.ModelViewSet):
+        prefetch_related_objects([product], 'labels')
+        return Response(ProductSerializer(product, context={'request': request}).data, status=status.HTTP_200_OK)
+
+    # POST /products/bulk-upsert/ -> create or update many products by sku
+    @extend_schema(request=BulkProductUpsertSerializer, responses=BulkProductUpsertResultSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-upsert')
+    def bulk_upsert(self, request):
+        # creates and updates, so both permissions are needed
+        if not user_has_perms(request, ['products.add_product', 'products.change_product']):
+            raise PermissionDenied()
+        serializer = BulkProductUpsertSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = upsert_products(serializer.validated_data['products'])
+        return Response(BulkProductUpsertResultSerializer(result).data, status=status.HTTP_200_OK)
+
+    # POST /products/bulk-stock/ -> add deltas to the stock of many products by sku
+    @extend_schema(request=BulkStockSerializer, responses=BulkStockResultSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-stock')
+    def bulk_stock(self, request):
+        if not user_has_perms(request, ['products.change_product']):
+            raise PermissionDenied()
+        serializer = BulkStockSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = adjust_stock(serializer.validated_data['items'])
+        return Response(BulkStockResultSerializer(result).data, status=status.HTTP_200_OK)
+
+    # GET /products/typeahead/?q=lap&limit=10 -> name (then sku) prefix matches
+    @extend_schema(parameters=[TypeaheadQuerySerializer], responses=TypeaheadSerializer(many=True))
+    @action(detail=False, methods=['get'])
+    def typeahead(self, request):
+        serializer = TypeaheadQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        rows = typeahead(serializer.validated_data['q'], serializer.validated_data['limit'])
+        return Response(TypeaheadSerializer(rows, many=True).data, status=status.HTTP_200_OK)
+
+class LabelViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = Label.objects.all()
+    cache_dependencies = (Label,)
+    serializer_class = LabelSerializer
+
+
+class AsyncProductView(AsyncReadOnlyView):
+    queryset = with_shard_stock(Product.objects.all())
+    serializer_class = ProductSerializer
+    filterset_class = ProductFilter
+    filter_backends = (ProductOrderingFilter,)
+    ordering_fields = ProductViewSet.ordering_fields
+    prefetch = ('labels',)
+
+    @property
+    def ordering(self):
+        return product_ordering(self.request.GET)
+
+
+class AsyncLabelView(AsyncReadOnlyView):
     queryset = Label.objects.all()
     serializer_class = LabelSerializer
@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import DailySalesRollup, RollupWatermark
+
+# Register your models here.
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'product', 'status', 'quantity', 'revenue')
+    list_filter = ('status', 'date')
+    list_select_related = ('product',)
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'processed_until')
@@ -0,0 +1,57 @@
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+from orders.models import Order, OrderItem
+from .models import DailySalesRollup
+
+
+def day_start(value):
+    # aware midnight of the day, so the filters compare the raw created_at column (and its index)
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+class SalesFilter(django_filters.FilterSet):
+    """
+    Same filters as OrderFilter, applied to the items of the orders.
+    CANCELLED orders are left out unless `status` asks for them.
+    """
+    customer_email = django_filters.CharFilter(field_name='order__customer__email', lookup_expr='icontains')
+    status = django_filters.MultipleChoiceFilter(field_name='order__status', choices=Order.STATUS_CHOICES)
+    # half-open range on created_at, both days included
+    date_from = django_filters.DateFilter(method='filter_date_from')
+    date_to = django_filters.DateFilter(method='filter_date_to')
+
+    class Meta:
+        model = OrderItem
+        fields = ['customer_email', 'status', 'date_from', 'date_to']
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.form.cleaned_data.get('status'):
+            queryset = queryset.exclude(order__status='CANCELLED')
+        return queryset
+
+    def filter_date_from(self, queryset, name, value):
+        return queryset.filter(order__created_at__gte=day_start(value))
+
+    def filter_date_to(self, queryset, name, value):
+        return queryset.filter(order__created_at__lt=day_start(value + timedelta(days=1)))
+
+
+class RollupFilter(django_filters.FilterSet):
+    """
+    SalesFilter for the DailySalesRollup rows (no customer filter: the rollup is per product).
+    """
+    status = django_filters.MultipleChoiceFilter(choices=Order.STATUS_CHOICES)
+    date_from = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_to = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = DailySalesRollup
+        fields = ['status', 'date_from', 'date_to']
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if not self.form.cleaned_data.get('status'):
+            queryset = queryset.exclude(status='CANCELLED')
+        return queryset
@@ -0,0 +1,37 @@
+from django.db import models
+from decimal import Decimal
+from orders.models import Order
+from products.models import Product
+
+
+# Create your models here.
+class DailySalesRollup(models.Model):
+    """
+    Units and revenue per day (in TIME_ZONE), product and order status. Maintained
+    by reports.tasks.refresh_daily_sales_rollup, never written by the API.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        ordering = ['date', 'product']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product', 'status'], name='daily_sales_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.product_id} - {self.status}"
+
+
+class RollupWatermark(models.Model):
+    """
+    How far (by Order.updated_at) a rollup has been processed.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.processed_until.isoformat()}"
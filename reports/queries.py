@@ -0,0 +1,77 @@
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Trunc
+
+from orders.models import OrderItem
+
+PERIODS = ('day', 'week', 'month')
+
+
+def _revenue():
+    return Sum(OrderItem.subtotal_expression())
+
+
+def revenue_by_period(items, period='day'):
+    """
+    Revenue, units and number of orders per day/week/month (in the project's time
+    zone) of the given OrderItem queryset, oldest first.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Invalid period: {period}")
+    return (items.annotate(period=Trunc('order__created_at', period, output_field=DateField()))
+            .values('period')
+            .annotate(revenue=_revenue(), units=Sum('quantity'), orders=Count('order', distinct=True))
+            .order_by('period'))
+
+
+def top_products(items, limit=10):
+    return (items.values('product', name=F('product__name'), sku=F('product__sku'))
+            .annotate(revenue=_revenue(), units=Sum('quantity'), orders=Count('order', distinct=True))
+            .order_by('-revenue', 'product')[:limit])
+
+
+def top_customers(items, limit=10):
+    return (items.values(customer=F('order__customer'), full_name=F('order__customer__full_name'),
+                         email=F('order__customer__email'))
+            .annotate(revenue=_revenue(), units=Sum('quantity'), orders=Count('order', distinct=True))
+            .order_by('-revenue', 'customer')[:limit])
+
+
+def revenue_by_label(items):
+    """
+    Revenue and units per product label. An item counts for every label of its
+    product; items of products without labels are grouped under label None.
+    """
+    return (items.values(label=F('product__labels'), name=F('product__labels__name'))
+            .annotate(revenue=_revenue(), units=Sum('quantity'), orders=Count('order', distinct=True))
+            .order_by('-revenue', 'label'))
+
+
+# DailySalesRollup versions of the reports above. The rollup has no per-order
+# data, so these rows have no `orders` count and there is no top customers.
+def _rollup_totals(rows):
+    # the model already has a `revenue` field, so the sum is renamed after the query
+    return rows.annotate(units=Sum('quantity'), amount=Sum('revenue'))
+
+
+def _rollup_rows(rows):
+    rows = list(rows)
+    for row in rows:
+        row['revenue'] = row.pop('amount')
+    return rows
+
+
+def rollup_revenue_by_period(rows, period='day'):
+    if period not in PERIODS:
+        raise ValueError(f"Invalid period: {period}")
+    return _rollup_rows(_rollup_totals(rows.annotate(period=Trunc('date', period, output_field=DateField()))
+                                       .values('period')).order_by('period'))
+
+
+def rollup_top_products(rows, limit=10):
+    return _rollup_rows(_rollup_totals(rows.values('product', name=F('product__name'), sku=F('product__sku')))
+                        .order_by('-amount', 'product')[:limit])
+
+
+def rollup_revenue_by_label(rows):
+    return _rollup_rows(_rollup_totals(rows.values(label=F('product__labels'), name=F('product__labels__name')))
+                        .order_by('-amount', 'label'))
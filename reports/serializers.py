@@ -0,0 +1,49 @@
+from rest_framework import serializers
+
+from .queries import PERIODS
+
+
+class RevenueByPeriodSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField(required=False)  # not available with source=rollup
+
+
+class TopProductSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    name = serializers.CharField()
+    sku = serializers.CharField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField(required=False)  # not available with source=rollup
+
+
+class TopCustomerSerializer(serializers.Serializer):
+    customer = serializers.IntegerField()
+    full_name = serializers.CharField()
+    email = serializers.EmailField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField(required=False)  # not available with source=rollup
+
+
+class RevenueByLabelSerializer(serializers.Serializer):
+    label = serializers.IntegerField(allow_null=True)
+    name = serializers.CharField(allow_null=True)
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    units = serializers.IntegerField()
+    orders = serializers.IntegerField(required=False)  # not available with source=rollup
+
+
+class PeriodQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=PERIODS, default='day')
+
+
+class SourceQuerySerializer(serializers.Serializer):
+    source = serializers.ChoiceField(choices=['items', 'rollup'], default='items',
+                                     help_text='rollup reads the DailySalesRollup table (no order counts)')
+
+
+class LimitQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
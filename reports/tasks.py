@@ -0,0 +1,91 @@
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from orders.models import Order, OrderItem
+from .filters import day_start
+from .models import DailySalesRollup, RollupWatermark
+
+ROLLUP_NAME = 'daily_sales'
+
+
+def touched_days(since=None):
+    """
+    Days (in TIME_ZONE) with orders created or whose status changed after `since`
+    (all days if None), by Order.updated_at.
+    """
+    orders = Order.objects.all() if since is None else Order.objects.filter(updated_at__gt=since)
+    return sorted(orders.annotate(day=TruncDate('created_at')).order_by().values_list('day', flat=True).distinct())
+
+
+def _days_filter(days):
+    # half-open created_at ranges (consecutive days merged), so the index on created_at is used
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    condition = Q(pk__in=[])
+    for start, end in ranges:
+        condition |= Q(order__created_at__gte=day_start(start), order__created_at__lt=day_start(end))
+    return condition
+
+
+def rebuild_days(days):
+    """
+    Replace the rollup rows of the given days with a fresh aggregation of their items.
+    """
+    with transaction.atomic():
+        DailySalesRollup.objects.filter(date__in=days).delete()
+        rows = (OrderItem.objects.filter(_days_filter(days))
+                .annotate(day=TruncDate('order__created_at'))
+                .values('day', 'product', order_status=F('order__status'))
+                .annotate(units=Sum('quantity'), amount=Sum(OrderItem.subtotal_expression()))
+                .order_by())
+        return len(DailySalesRollup.objects.bulk_create([
+            DailySalesRollup(date=row['day'], product_id=row['product'], status=row['order_status'],
+                             quantity=row['units'], revenue=row['amount'])
+            for row in rows
+        ], batch_size=1000))
+
+
+@shared_task
+def refresh_daily_sales_rollup(full=False):
+    """
+    Periodic task to keep DailySalesRollup up to date.
+
+    Only the days touched since the last run (orders created, paid or cancelled
+    after the watermark) are recomputed, SALES_ROLLUP_DAYS_PER_BATCH days per
+    aggregation. The watermark is moved back by SALES_ROLLUP_OVERLAP_MINUTES so
+    transactions that committed late are not missed; recomputing a day twice is
+    harmless. `full=True` (or the first run) rebuilds every day, which is also the
+    way to pick up deleted orders.
+
+    A run is a single transaction holding the watermark row (SELECT ... FOR UPDATE),
+    so readers never see a half rebuilt rollup and runs can't overlap: a run that
+    finds the row locked is skipped.
+    """
+    started = timezone.now()
+    with transaction.atomic():
+        _, first_run = RollupWatermark.objects.get_or_create(name=ROLLUP_NAME, defaults={'processed_until': started})
+        watermark = RollupWatermark.objects.select_for_update(skip_locked=True).filter(name=ROLLUP_NAME).first()
+        if watermark is None:
+            return "Sales rollup refresh skipped: another run is in progress."
+
+        if full or first_run:
+            since = None
+            DailySalesRollup.objects.all().delete()
+        else:
+            since = watermark.processed_until - timedelta(minutes=settings.SALES_ROLLUP_OVERLAP_MINUTES)
+
+        days = touched_days(since)
+        batch = settings.SALES_ROLLUP_DAYS_PER_BATCH
+        rows = sum(rebuild_days(days[i:i + batch]) for i in range(0, len(days), batch))
+
+        watermark.processed_until = started
+        watermark.save(update_fields=['processed_until'])
+    return f"Sales rollup refreshed: {len(days)} days, {rows} rows."
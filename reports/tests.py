@@ -0,0 +1,113 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from customers.models import Customer
+from orders.models import Order, OrderItem
+from orders.tests import BaseAPITestCase
+from products.models import Label
+from reports.models import DailySalesRollup
+from reports.tasks import refresh_daily_sales_rollup
+
+
+class SalesReportTests(BaseAPITestCase):
+    def setUp(self):
+        other = Customer.objects.create(full_name="Otro Cliente", email="otro@example.com")
+        self.prod.labels.add(Label.objects.create(name="Promo"))
+        # (cliente, estado, fecha, [(producto, cantidad, precio)])
+        for customer, status, day, items in [
+            (self.cust, "PAID", 1, [(self.prod, 2, 100), (self.prod2, 1, 50)]),
+            (self.cust, "PENDING", 1, [(self.prod2, 4, 50)]),
+            (other, "PAID", 9, [(self.prod, 1, 90)]),
+            (other, "CANCELLED", 9, [(self.prod, 5, 100)]),
+        ]:
+            order = Order.objects.create(customer=customer, status=status)
+            created = datetime(2025, 9, day, 15, tzinfo=dt_timezone.utc)
+            Order.objects.filter(id=order.id).update(created_at=created, updated_at=created)
+            for product, quantity, price in items:
+                OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=price)
+        self.other = other
+        self.client = self.auth_client(self.tok_manager)
+
+    def test_revenue_by_period_in_a_single_query(self):
+        """
+        Ingresos y unidades por día/mes calculados con una sola consulta agregada;
+        las órdenes canceladas se excluyen por defecto.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("sales-report-revenue"), {"period": "day"})
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual([dict(r) for r in resp.data], [
+            {"period": "2025-09-01", "revenue": "450.00", "units": 7, "orders": 2},
+            {"period": "2025-09-09", "revenue": "90.00", "units": 1, "orders": 1},
+        ])
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "orders_orderitem"' in q["sql"]]), 1)
+
+        resp = self.client.get(reverse("sales-report-revenue"), {"period": "month", "status": "PAID"})
+        self.assertEqual([(r["period"], r["revenue"]) for r in resp.data], [("2025-09-01", "340.00")])
+
+        resp = self.client.get(reverse("sales-report-revenue"), {"period": "year"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_top_products_customers_and_labels(self):
+        """
+        Rankings de productos y clientes y total por etiqueta, con filtros de fecha.
+        """
+        resp = self.client.get(reverse("sales-report-top-products"), {"limit": 1})
+        self.assertEqual([(r["sku"], r["revenue"], r["units"]) for r in resp.data], [(self.prod.sku, "290.00", 3)])
+
+        resp = self.client.get(reverse("sales-report-top-customers"), {"date_from": "2025-09-05"})
+        self.assertEqual([(r["email"], r["revenue"], r["orders"]) for r in resp.data], [(self.other.email, "90.00", 1)])
+
+        # date_to incluye el día completo, con un rango sobre created_at (sin castear a fecha)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("sales-report-top-customers"),
+                                   {"date_from": "2025-09-09", "date_to": "2025-09-09"})
+        self.assertEqual([(r["email"], r["revenue"]) for r in resp.data], [(self.other.email, "90.00")])
+        sql = next(q["sql"] for q in ctx.captured_queries if 'FROM "orders_orderitem"' in q["sql"])
+        self.assertNotIn("django_datetime_cast_date", sql)
+        self.assertIn('"orders_order"."created_at" <', sql)
+
+        resp = self.client.get(reverse("sales-report-by-label"))
+        self.assertEqual([(r["name"], r["revenue"]) for r in resp.data], [("Promo", "290.00"), (None, "250.00")])
+
+    def test_rollup_matches_items_and_refreshes_touched_days(self):
+        """
+        La tabla DailySalesRollup da los mismos reportes que los items, y el refresco
+        incremental solo recalcula los días tocados desde la marca de agua (incluido un cancel).
+        """
+        self.assertEqual(refresh_daily_sales_rollup(), "Sales rollup refreshed: 2 days, 5 rows.")
+        for name, params in [("sales-report-revenue", {"period": "month"}),
+                             ("sales-report-top-products", {}),
+                             ("sales-report-by-label", {"status": ["PAID", "CANCELLED"]})]:
+            items = self.client.get(reverse(name), params).data
+            rollup = self.client.get(reverse(name), {**params, "source": "rollup"}).data
+            self.assertEqual([{k: v for k, v in r.items() if k != "orders"} for r in items],
+                             [dict(r) for r in rollup], name)
+
+        paid = Order.objects.get(customer=self.other, status="PAID")
+        self.client.post(reverse("order-cancel", args=[paid.id]))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(refresh_daily_sales_rollup(), "Sales rollup refreshed: 1 days, 1 rows.")
+        # los días se filtran con rangos sobre created_at (sin castear a fecha en el WHERE)
+        sql = next(q["sql"] for q in ctx.captured_queries if 'FROM "orders_orderitem"' in q["sql"])
+        where = sql.split(" WHERE ", 1)[1]
+        self.assertNotIn("django_datetime_cast_date", where)
+        self.assertIn('"orders_order"."created_at" <', where)
+        self.assertEqual(
+            list(DailySalesRollup.objects.filter(date="2025-09-09").values_list("status", "quantity", "revenue")),
+            [("CANCELLED", 6, Decimal("590.00"))])
+
+        resp = self.client.get(reverse("sales-report-top-customers"), {"source": "rollup"})
+        self.assertEqual(resp.status_code, 400)
+
+        # una reconstrucción completa que falla no deja el rollup vacío ni a medias
+        before = list(DailySalesRollup.objects.values_list("date", "product", "status", "quantity"))
+        with mock.patch("reports.tasks.rebuild_days", side_effect=[1, DatabaseError("boom")]), \
+                self.settings(SALES_ROLLUP_DAYS_PER_BATCH=1), self.assertRaises(DatabaseError):
+            refresh_daily_sales_rollup(full=True)
+        self.assertEqual(list(DailySalesRollup.objects.values_list("date", "product", "status", "quantity")), before)
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from .views import SalesReportViewSet
+
+router = DefaultRouter()
+router.register(r'reports/sales', SalesReportViewSet, basename='sales-report')
+
+urlpatterns = router.urls
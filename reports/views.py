@@ -0,0 +1,94 @@
+from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from drf_spectacular.utils import extend_schema
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from orders.models import OrderItem
+from . import queries
+from .filters import RollupFilter, SalesFilter
+from .models import DailySalesRollup
+from .serializers import (
+    LimitQuerySerializer, PeriodQuerySerializer, RevenueByLabelSerializer, RevenueByPeriodSerializer,
+    SourceQuerySerializer, TopCustomerSerializer, TopProductSerializer,
+)
+
+
+class SalesReportViewSet(viewsets.GenericViewSet):
+    """
+    Sales aggregates computed by the database over the order items, filtered like
+    the orders list (status, date range, customer email). CANCELLED orders are
+    excluded unless `status` is given.
+
+    With `?source=rollup` they read the pre-aggregated DailySalesRollup table
+    instead (refreshed every few minutes by reports.tasks).
+    """
+    queryset = OrderItem.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = SalesFilter
+    pagination_class = None
+
+    def get_items(self):
+        return self.filter_queryset(self.get_queryset()).order_by()
+
+    def get_rollup_rows(self):
+        if 'customer_email' in self.request.query_params:
+            raise ValidationError({'customer_email': 'Not available with source=rollup.'})
+        filterset = RollupFilter(self.request.query_params, queryset=DailySalesRollup.objects.all(),
+                                 request=self.request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs.order_by()
+
+    def query_param(self, serializer_class, name):
+        serializer = serializer_class(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data[name]
+
+    def use_rollup(self):
+        return self.query_param(SourceQuerySerializer, 'source') == 'rollup'
+
+    # GET /reports/sales/revenue/?period=day|week|month
+    @extend_schema(parameters=[PeriodQuerySerializer, SourceQuerySerializer],
+                   responses=RevenueByPeriodSerializer(many=True))
+    @action(detail=False, methods=['get'])
+    def revenue(self, request):
+        period = self.query_param(PeriodQuerySerializer, 'period')
+        if self.use_rollup():
+            rows = queries.rollup_revenue_by_period(self.get_rollup_rows(), period)
+        else:
+            rows = queries.revenue_by_period(self.get_items(), period)
+        return Response(RevenueByPeriodSerializer(rows, many=True).data)
+
+    # GET /reports/sales/top-products/?limit=10
+    @extend_schema(parameters=[LimitQuerySerializer, SourceQuerySerializer],
+                   responses=TopProductSerializer(many=True))
+    @action(detail=False, methods=['get'], url_path='top-products')
+    def top_products(self, request):
+        limit = self.query_param(LimitQuerySerializer, 'limit')
+        if self.use_rollup():
+            rows = queries.rollup_top_products(self.get_rollup_rows(), limit)
+        else:
+            rows = queries.top_products(self.get_items(), limit)
+        return Response(TopProductSerializer(rows, many=True).data)
+
+    # GET /reports/sales/top-customers/?limit=10
+    @extend_schema(parameters=[LimitQuerySerializer], responses=TopCustomerSerializer(many=True))
+    @action(detail=False, methods=['get'], url_path='top-customers')
+    def top_customers(self, request):
+        if self.use_rollup():
+            raise ValidationError({'source': 'Top customers are not available from the rollup.'})
+        rows = queries.top_customers(self.get_items(), self.query_param(LimitQuerySerializer, 'limit'))
+        return Response(TopCustomerSerializer(rows, many=True).data)
+
+    # GET /reports/sales/by-label/
+    @extend_schema(parameters=[SourceQuerySerializer], responses=RevenueByLabelSerializer(many=True))
+    @action(detail=False, methods=['get'], url_path='by-label')
+    def by_label(self, request):
+        if self.use_rollup():
+            rows = queries.rollup_revenue_by_label(self.get_rollup_rows())
+        else:
+            rows = queries.revenue_by_label(self.get_items())
+        return Response(RevenueByLabelSerializer(rows, many=True).data)
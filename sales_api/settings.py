@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from decouple import config
 import dj_database_url
@@ -51,6 +52,8 @@ INSTALLED_APPS = [
     'products',
     'orders',
     'customers',
+    'reports',
+    'events',
     'core'
 ]
 
@@ -106,6 +109,35 @@ DATABASES = {
 }
 
 
+# Cache
+# Redis (shared by every web/celery process) when CACHE_URL is set, in-memory otherwise.
+# Tests always run against the in-memory backend.
+TESTING = sys.argv[1:2] == ['test']
+CACHE_URL = config('CACHE_URL', default='')
+
+if CACHE_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Whether every process sees the same cache. The version stamps, cached responses,
+# ETag/Last-Modified, count estimates, roles and bulk job owners rely on it, so
+# without CACHE_URL they are turned off (the test run is a single process).
+SHARED_CACHE = bool(CACHE_URL) or TESTING
+
+# Seconds a cached product/label response is kept (0 disables the response cache)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=600, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -158,16 +190,29 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-        'rest_framework.permissions.DjangoModelPermissions',
+        'core.permissions.CachedDjangoModelPermissions',
         'core.permissions.DenyIfNoRole',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.SelectablePagination',
     'PAGE_SIZE': 10,
 }
 
+# Build Order/Product read representations directly instead of through the DRF fields (same output)
+FAST_READ_SERIALIZERS = config('FAST_READ_SERIALIZERS', default=True, cast=bool)
+
+# Seconds a user's groups/permissions stay in the shared cache (0 = resolve on every request)
+ROLES_CACHE_TIMEOUT = config('ROLES_CACHE_TIMEOUT', default=60, cast=int)
+
+# Pagination counts: exact up to this many rows, cached/planner estimate above it
+PAGINATION_EXACT_COUNT_THRESHOLD = config('PAGINATION_EXACT_COUNT_THRESHOLD', default=1000, cast=int)
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Rows read (and prefetched) per chunk by the ?format=ndjson / ?format=csv list streams
+STREAMING_CHUNK_SIZE = config('STREAMING_CHUNK_SIZE', default=2000, cast=int)
+
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Mini Sales API',
@@ -186,3 +231,38 @@ CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://redis:6
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'America/Asuncion'
+
+# Order exports
+ORDERS_EXPORT_DIR = config('ORDERS_EXPORT_DIR', default='/tmp')
+ORDERS_EXPORT_CHUNK_SIZE = config('ORDERS_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Daily sales rollup (reports.tasks.refresh_daily_sales_rollup)
+SALES_ROLLUP_OVERLAP_MINUTES = config('SALES_ROLLUP_OVERLAP_MINUTES', default=10, cast=int)
+SALES_ROLLUP_DAYS_PER_BATCH = config('SALES_ROLLUP_DAYS_PER_BATCH', default=31, cast=int)
+
+# Stock held by a PENDING order before the sweeper (orders.tasks.expire_stock_holds) gives it back
+STOCK_HOLD_TTL_MINUTES = config('STOCK_HOLD_TTL_MINUTES', default=15, cast=int)
+STOCK_HOLD_SWEEP_BATCH_SIZE = config('STOCK_HOLD_SWEEP_BATCH_SIZE', default=500, cast=int)
+
+# Responses stored for Idempotency-Key requests (order create, pay, cancel), purged by core.tasks.purge_idempotency_keys
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+IDEMPOTENCY_PURGE_BATCH_SIZE = config('IDEMPOTENCY_PURGE_BATCH_SIZE', default=5000, cast=int)
+
+# Order event outbox (events app): drained every EVENTS_DRAIN_INTERVAL_SECONDS to EVENTS_SINK
+# ('redis' stream, 'file' or 'memory'; tests always use memory)
+EVENTS_SINK = 'memory' if TESTING else config('EVENTS_SINK', default='redis')
+# own Redis DB: never the CACHE_URL one, whose clear() (FLUSHDB) and evictions would drop the stream
+EVENTS_REDIS_URL = config('EVENTS_REDIS_URL', default='redis://redis:6379/2')
+EVENTS_REDIS_STREAM = config('EVENTS_REDIS_STREAM', default='orders.events')
+EVENTS_REDIS_STREAM_MAXLEN = config('EVENTS_REDIS_STREAM_MAXLEN', default=1000000, cast=int)
+EVENTS_FILE_PATH = config('EVENTS_FILE_PATH', default='/tmp/order_events.ndjson')
+EVENTS_DRAIN_BATCH_SIZE = config('EVENTS_DRAIN_BATCH_SIZE', default=500, cast=int)
+EVENTS_DRAIN_INTERVAL_SECONDS = config('EVENTS_DRAIN_INTERVAL_SECONDS', default=5, cast=int)
+EVENTS_FEED_PAGE_SIZE = config('EVENTS_FEED_PAGE_SIZE', default=100, cast=int)
+
+# Bulk order ingestion (POST /api/orders/bulk/)
+ORDERS_BULK_MAX_ORDERS = config('ORDERS_BULK_MAX_ORDERS', default=10000, cast=int)
+
+# Bulk catalog sync (POST /api/products/bulk-upsert/, /api/products/bulk-stock/)
+PRODUCTS_BULK_MAX_ROWS = config('PRODUCTS_BULK_MAX_ROWS', default=50000, cast=int)
+PRODUCTS_BULK_CHUNK_SIZE = config('PRODUCTS_BULK_CHUNK_SIZE', default=1000, cast=int)
@@ -29,6 +29,8 @@ urlpatterns = [
     path('api/', include('products.urls')),
     path('api/', include('customers.urls')),
     path('api/', include('orders.urls')),
+    path('api/', include('reports.urls')),
+    path('api/', include('events.urls')),
 
     # JWT Auth
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),